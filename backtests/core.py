@@ -1,7 +1,15 @@
+import inspect
+import pickle
+
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 
+from backtests.barframe import BarFrame
+
+# bars converted to Python lists at a time by Strategy.simulate_from
+SIM_CHUNK = 65_536
+
 @dataclass
 class Trade:
     entry_time: pd.Timestamp
@@ -16,94 +24,286 @@ class Strategy:
     maker_spread_threshold = 0.0002  # 0.02%
     taker_fee_bp = 0.05  # bp per side
     slippage_bp = 0.5  # bp per side
+    #: other modules whose source feeds the signal cache key
+    CACHE_MODULES = ()
+    #: bump when signals change through code not covered by the key
+    CACHE_VERSION = 1
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         raise NotImplementedError
 
-    def simulate(self, df: pd.DataFrame) -> tuple:
-        signals = self.generate_signals(df)
-        df = df.copy()
-        df['signal'] = signals
+    def generate_panel_signals(self, panel) -> np.ndarray:
+        """Return a ``(symbols, bars)`` signal array for a :class:`Panel`.
+
+        The default runs :meth:`generate_signals` per symbol; strategies
+        override it to compute every symbol in one vectorized pass. Slots
+        without a bar get signal 0.
+        """
+        out = np.zeros(panel.mask.shape, dtype=np.int8)
+        for i, sym in enumerate(panel.symbols):
+            out[i, panel.mask[i]] = self.generate_signals(panel.frame(sym)).to_numpy()
+        return out
+
+    def reset(self) -> None:
+        """Clear any incremental state kept by :meth:`on_bar`."""
+
+    def on_bar(self, ts_ms: int, bar: dict) -> int:
+        """Consume a single bar and return its signal.
+
+        Incremental counterpart of :meth:`generate_signals`: feeding bars one
+        at a time must yield the same signals as the batch call over the
+        whole frame. ``bar`` maps column names (``close``, ``high``, ...) to
+        values and ``ts_ms`` is the bar start in epoch milliseconds.
+        """
+        raise NotImplementedError
+
+    #: bars before the first one that its signal depends on
+    warmup_bars = 0
+
+    def simulate(self, df, signals=None) -> tuple:
+        """Run the bar-by-bar backtest on a DataFrame or :class:`BarFrame`.
+
+        Returns ``(trades, equity)``. For a BarFrame the equity is returned
+        as a BarFrame with a single ``equity`` column sharing its timestamps.
+        """
+        trades, equity, _ = self.simulate_from(df, signals=signals)
+        return trades, equity
 
-        position = 0
-        entry_price = 0.0
-        entry_idx = None
-        stop_price = None
-        take_price = None
+    def simulate_from(self, df, state=None, signals=None) -> tuple:
+        """Run :meth:`simulate` starting from a saved :class:`SimState`.
+
+        ``df`` holds only the bars after ``state.last_ts``; the indicator
+        tail kept in the state supplies the history their signals need.
+        Returns ``(trades, equity, state)`` where trades and equity cover
+        ``df`` only, so appending them to the output of the earlier runs
+        gives exactly the result of a single run over all bars.
+        """
+        if state is not None:
+            params = strategy_params(self)
+            if state.params != params:
+                raise ValueError(f"state was saved with {state.params}, not {params}")
+            if len(df) and _ts_ms(df)[0] <= state.last_ts:
+                raise ValueError("bars overlap the saved state")
+        if signals is None:
+            signals = self._resume_signals(df, state)
+        n = len(df)
+        signal_arr = np.asarray(signals)
+        open_arr = np.asarray(df['open'])
+        high_arr = np.asarray(df['high'])
+        low_arr = np.asarray(df['low'])
+        close_arr = np.asarray(df['close'])
+        spread_arr = np.asarray(df['spread']) if 'spread' in df.columns else None
+        range_arr = np.asarray(df['range']) if 'range' in df.columns else None
+        index = df.index
+
+        if state is None:
+            state = SimState()
+        position = state.position
+        entry_price = state.entry_price
+        entry_time = state.entry_time
+        # bar numbers are relative to df, so an earlier entry is negative
+        entry_idx = None if state.held is None else -state.held
+        stop_price = state.stop_price
+        take_price = state.take_price
         trades = []
-        equity = []
-        cash = 1.0
-
-        for i in range(len(df)):
-            row = df.iloc[i]
-            signal = row['signal']
-            price = row['open']
-            spread = row.get('spread', 0)
-            fee = 0.0
-            if spread < self.maker_spread_threshold:
-                fee = self.taker_fee_bp / 10000
-            slip = self.slippage_bp / 10000
-
-            if position == 0:
-                if signal != 0:
-                    position = signal * getattr(self, "risk_mult", 1.0)
-                    trade_price = price * (1 + slip * position)
-                    entry_price = trade_price
-                    entry_idx = i
-                    rng = row.get('range', 0)
-                    stop_price = entry_price - position * 0.5 * rng
-                    take_price = entry_price + position * 1.0 * rng
-            else:
-                exit_flag = False
-                exit_at = price
-                # stop or take profit
-                if position == 1:
-                    if row['low'] <= stop_price:
-                        exit_at = stop_price
-                        exit_flag = True
-                    elif row['high'] >= take_price:
-                        exit_at = take_price
-                        exit_flag = True
+        equity = np.empty(n, dtype=np.float64)
+        cash = state.cash
+
+        for a in range(0, n, SIM_CHUNK):
+            b = min(a + SIM_CHUNK, n)
+            # plain Python lists make the per-bar loop much cheaper than
+            # indexing arrays; converting one chunk at a time keeps them small
+            signal_col = signal_arr[a:b].tolist()
+            open_col = open_arr[a:b].tolist()
+            high_col = high_arr[a:b].tolist()
+            low_col = low_arr[a:b].tolist()
+            close_col = close_arr[a:b].tolist()
+            spread_col = spread_arr[a:b].tolist() if spread_arr is not None else [0] * (b - a)
+            range_col = range_arr[a:b].tolist() if range_arr is not None else [0] * (b - a)
+            chunk_equity = []
+            for j in range(b - a):
+                i = a + j
+                signal = signal_col[j]
+                price = open_col[j]
+                spread = spread_col[j]
+                fee = 0.0
+                if spread < self.maker_spread_threshold:
+                    fee = self.taker_fee_bp / 10000
+                slip = self.slippage_bp / 10000
+
+                if position == 0:
+                    if signal != 0:
+                        position = signal * getattr(self, "risk_mult", 1.0)
+                        trade_price = price * (1 + slip * position)
+                        entry_price = trade_price
+                        entry_idx = i
+                        entry_time = index[i]
+                        rng = range_col[j]
+                        stop_price = entry_price - position * 0.5 * rng
+                        take_price = entry_price + position * 1.0 * rng
                 else:
-                    if row['high'] >= stop_price:
-                        exit_at = stop_price
+                    exit_flag = False
+                    exit_at = price
+                    # stop or take profit
+                    if position == 1:
+                        if low_col[j] <= stop_price:
+                            exit_at = stop_price
+                            exit_flag = True
+                        elif high_col[j] >= take_price:
+                            exit_at = take_price
+                            exit_flag = True
+                    else:
+                        if high_col[j] >= stop_price:
+                            exit_at = stop_price
+                            exit_flag = True
+                        elif low_col[j] <= take_price:
+                            exit_at = take_price
+                            exit_flag = True
+                    # max hold 120 bars
+                    if entry_idx is not None and i - entry_idx >= 120:
                         exit_flag = True
-                    elif row['low'] <= take_price:
-                        exit_at = take_price
+                    if signal == -position:
                         exit_flag = True
-                # max hold 120 bars
-                if entry_idx is not None and i - entry_idx >= 120:
-                    exit_flag = True
-                if signal == -position:
-                    exit_flag = True
-
-                if exit_flag:
-                    exit_price = exit_at * (1 - slip * position)
-                    pnl = position * (exit_price - entry_price) - fee * entry_price - fee * exit_price
-                    cash *= (1 + pnl / entry_price)
-                    trades.append(Trade(
-                        entry_time=df.index[entry_idx],
-                        exit_time=df.index[i],
-                        position=position,
-                        entry_price=entry_price,
-                        exit_price=exit_price,
-                        pnl=pnl,
-                    ))
-                    position = 0
-                    entry_idx = None
-            # mark to market
-            if position != 0:
-                mtm = position * (row['close'] - entry_price)
-                eq = cash * (1 + mtm / entry_price)
-            else:
-                eq = cash
-            equity.append(eq)
 
-        equity_series = pd.Series(equity, index=df.index)
+                    if exit_flag:
+                        exit_price = exit_at * (1 - slip * position)
+                        pnl = position * (exit_price - entry_price) - fee * entry_price - fee * exit_price
+                        cash *= (1 + pnl / entry_price)
+                        trades.append(Trade(
+                            entry_time=entry_time,
+                            exit_time=index[i],
+                            position=position,
+                            entry_price=entry_price,
+                            exit_price=exit_price,
+                            pnl=pnl,
+                        ))
+                        position = 0
+                        entry_idx = None
+                        entry_time = None
+                # mark to market
+                if position != 0:
+                    mtm = position * (close_col[j] - entry_price)
+                    eq = cash * (1 + mtm / entry_price)
+                else:
+                    eq = cash
+                chunk_equity.append(eq)
+            equity[a:b] = chunk_equity
+
+        new_state = SimState(
+            position=position,
+            entry_price=entry_price,
+            entry_time=entry_time,
+            held=None if entry_idx is None else n - entry_idx,
+            stop_price=stop_price,
+            take_price=take_price,
+            cash=cash,
+            last_equity=float(equity[-1]) if n else state.last_equity,
+            last_ts=int(_ts_ms(df)[-1]) if n else state.last_ts,
+            tail=_tail(df, state.tail, self.warmup_bars),
+            params=strategy_params(self),
+        )
         trades_df = pd.DataFrame([t.__dict__ for t in trades])
-        return trades_df, equity_series
+        if isinstance(df, BarFrame):
+            equity_bars = BarFrame(df.ts, {'equity': equity})
+            return trades_df, equity_bars, new_state
+        equity_series = pd.Series(equity, index=df.index)
+        return trades_df, equity_series, new_state
+
+    def _resume_signals(self, df, state):
+        """Signals for ``df`` computed with the state's indicator tail in front."""
+        if state is None or state.tail is None or not len(state.tail) or not len(df):
+            return self.generate_signals(df)
+        tail = state.tail
+        k = len(tail)
+        if isinstance(df, BarFrame):
+            full = BarFrame(
+                np.concatenate([tail.ts, df.ts]),
+                {c: np.concatenate([tail[c], df[c]]) for c in df.columns},
+            )
+        else:
+            full = pd.concat([tail.to_frame(), df])
+        signals = self.generate_signals(full)
+        # carry derived columns such as ``range`` over to the new bars
+        for c in full.columns:
+            if c not in tail:
+                df[c] = np.asarray(full[c])[k:]
+        if isinstance(df, BarFrame):
+            return np.asarray(signals)[k:]
+        return pd.Series(np.asarray(signals)[k:], index=df.index)
+
+
+@dataclass
+class SimState:
+    """Where :meth:`Strategy.simulate_from` left off.
+
+    ``held`` counts bars since the open position was entered, ``tail``
+    keeps the last ``warmup_bars`` input bars as a :class:`BarFrame` and
+    ``params`` the constructor arguments of the strategy that produced it.
+    """
+
+    position: float = 0
+    entry_price: float = 0.0
+    entry_time: pd.Timestamp = None
+    held: int = None
+    stop_price: float = None
+    take_price: float = None
+    cash: float = 1.0
+    last_equity: float = 1.0
+    last_ts: int = -1
+    tail: BarFrame = None
+    params: dict = None
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as fh:
+            pickle.dump(self, fh)
+
+    @classmethod
+    def load(cls, path: str) -> "SimState":
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+
+def strategy_params(strat) -> dict:
+    """Constructor arguments of ``strat`` as currently set on the instance."""
+    params = {}
+    for name, p in inspect.signature(type(strat).__init__).parameters.items():
+        if name == "self" or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+        params[name] = getattr(strat, name, p.default)
+    return params
+
+
+def _ts_ms(df) -> np.ndarray:
+    if isinstance(df, BarFrame):
+        return df.ts
+    return pd.DatetimeIndex(df.index).as_unit("ms").asi8
+
+
+def _tail(df, previous, size: int):
+    """Last ``size`` bars of ``previous`` followed by ``df``, without derived columns."""
+    if size <= 0:
+        return None
+    bars = df if isinstance(df, BarFrame) else BarFrame.from_frame(df)
+    cols = [c for c in bars.columns if c not in _DERIVED]
+    ts = bars.ts[-size:]
+    data = {c: bars[c][-size:] for c in cols}
+    short = size - len(ts)
+    if short > 0 and previous is not None and len(previous):
+        ts = np.concatenate([previous.ts[-short:], ts])
+        data = {c: np.concatenate([previous[c][-short:], data[c]]) for c in cols}
+    return BarFrame(ts.copy(), {c: v.copy() for c, v in data.items()})
+
+
+# columns written by generate_signals rather than loaded with the bars
+_DERIVED = ("range", "predicted_funding")
+
+def _equity(equity) -> pd.Series:
+    if isinstance(equity, BarFrame):
+        return equity.series('equity')
+    return equity
 
 def cagr(equity: pd.Series) -> float:
+    equity = _equity(equity)
     if equity.empty:
         return 0.0
     days = (equity.index[-1] - equity.index[0]).days / 365.25
@@ -112,11 +312,13 @@ def cagr(equity: pd.Series) -> float:
     return (equity.iloc[-1] / equity.iloc[0]) ** (1/days) - 1
 
 def max_drawdown(equity: pd.Series) -> float:
+    equity = _equity(equity)
     cummax = equity.cummax()
     dd = equity / cummax - 1
     return dd.min()
 
 def sharpe_ratio(equity: pd.Series) -> float:
+    equity = _equity(equity)
     rets = equity.pct_change().dropna()
     if rets.std() == 0:
         return 0.0
@@ -154,15 +356,35 @@ class PortfolioSimulator:
     """Combine multiple strategies into a portfolio."""
 
     def __init__(self, strategies, risk_scale: float = 0.5):
-        self.strategies = strategies  # list of (name, symbol, instance, df)
+        self.strategies = strategies  # list of (name, symbol, instance, df[, signals])
         self.risk_scale = risk_scale
 
+    @classmethod
+    def from_panel(cls, strategies, panel, risk_scale: float = 0.5, cache=None):
+        """Build a simulator for every (name, instance) pair over a panel.
+
+        Signals for all symbols are generated with one
+        ``generate_panel_signals`` call per strategy instead of one
+        ``generate_signals`` call per symbol, or read from ``cache`` (a
+        :class:`~backtests.signal_cache.SignalCache`) when given.
+        """
+        items = []
+        for name, strat in strategies:
+            if cache is not None:
+                signals = cache.panel_signals(strat, panel)
+            else:
+                signals = strat.generate_panel_signals(panel)
+            for i, sym in enumerate(panel.symbols):
+                m = panel.mask[i]
+                items.append((name, sym, strat, panel.frame(sym), signals[i, m]))
+        return cls(items, risk_scale=risk_scale)
+
     def run(self):
         results = []
         equities = []
         trades_all = []
-        for name, symbol, strat, df in self.strategies:
-            trades, equity = strat.simulate(df)
+        for name, symbol, strat, df, *signals in self.strategies:
+            trades, equity = strat.simulate(df, *signals)
             if len(trades) == 0:
                 equity = pd.Series(dtype=float)
             kelly = kelly_fraction(trades)
@@ -0,0 +1,257 @@
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from backtests.barframe import BarFrame
+
+
+def frame_stream(df):
+    """Yield ``(ts_ms, bar)`` from a DataFrame or :class:`BarFrame`, oldest first."""
+    if isinstance(df, BarFrame):
+        ts = df.ts.tolist()
+    else:
+        ts = pd.DatetimeIndex(df.index).as_unit("ms").asi8.tolist()
+    cols = list(df.columns)
+    values = [np.asarray(df[c]).tolist() for c in cols]
+    for i, t in enumerate(ts):
+        yield t, {c: v[i] for c, v in zip(cols, values)}
+
+
+def merge_streams(streams: dict):
+    """K-way merge of per-symbol ``(ts_ms, bar)`` streams into ``(ts_ms, symbol, bar)``.
+
+    Only the head of each stream is held at a time. Bars with equal
+    timestamps come out in the order the symbols were given.
+    """
+    tagged = [_tag(stream, k, sym) for k, (sym, stream) in enumerate(streams.items())]
+    for ts, _, sym, bar in heapq.merge(*tagged):
+        yield ts, sym, bar
+
+
+def _tag(stream, k: int, sym: str):
+    # k breaks timestamp ties so heapq never compares the bar dicts
+    for ts, bar in stream:
+        yield ts, k, sym, bar
+
+
+@dataclass
+class _Slot:
+    """One strategy instance trading one symbol."""
+
+    name: str
+    symbol: str
+    strat: object
+    side: int = 0
+    qty: float = 0.0
+    entry_price: float = 0.0
+    entry_ts: int = 0
+    held: int = 0
+    stop: float = None
+    take: float = None
+    margin: float = 0.0
+    fee: float = 0.0  # paid on entry
+    weight: float = 0.0  # share of equity committed on entry
+    pending: int = 0  # side to open (+1/-1), or 2 to close
+    pending_range: float = 0.0
+
+
+class EventEngine:
+    """Event-driven portfolio backtest over many symbols with one shared account.
+
+    Bars from every symbol are merged in time order and passed to each
+    strategy's :meth:`Strategy.on_bar`. Signals are filled at the next open
+    of the symbol with the strategy's slippage and taker fee. Stops,
+    take-profits and the maximum hold follow :meth:`Strategy.simulate`.
+    Every entry commits ``allocation * risk_mult`` of current equity as
+    notional and ``notional / leverage`` as margin. It is rejected when
+    margin is short or ``max_positions`` / ``max_per_symbol`` would be
+    exceeded.
+
+    Work is constant per bar and strategy, and memory is bounded by the
+    number of strategy slots plus one equity sample per ``equity_every`` ms.
+    """
+
+    def __init__(
+        self,
+        strategies,
+        capital: float = 1.0,
+        allocation: float = 0.1,
+        leverage: float = 1.0,
+        max_positions: int = None,
+        max_per_symbol: int = None,
+        max_hold: int = 120,
+        equity_every: int = 60_000,
+    ):
+        self.strategies = strategies  # list of (name, factory) pairs
+        self.capital = capital
+        self.allocation = allocation
+        self.leverage = leverage
+        self.max_positions = max_positions
+        self.max_per_symbol = max_per_symbol
+        self.max_hold = max_hold
+        self.equity_every = equity_every
+
+    def run(self, streams: dict) -> tuple:
+        """Run over ``{symbol: stream of (ts_ms, bar)}``; returns ``(trades, equity)``.
+
+        ``trades`` has one row per closed trade; ``pnl`` is per unit, as in
+        :meth:`Strategy.simulate`, and ``pnl_value`` is in account currency.
+        ``weight`` is the share of equity the trade committed on entry.
+        Counts of rejected entries by reason are left in ``self.rejected``.
+        """
+        slots = {
+            sym: [_Slot(name, sym, factory()) for name, factory in self.strategies]
+            for sym in streams
+        }
+        self.rejected = Counter()
+        self.balance = self.capital
+        self.margin = 0.0
+        self.open_count = 0
+        self._per_symbol = Counter()
+        # sum of qty * (mark - entry) kept up to date bar by bar
+        self._unrealised = 0.0
+        self._net_qty = dict.fromkeys(streams, 0.0)
+        self._mark = {}
+        trades = []
+        eq_ts = []
+        eq_val = []
+        last_ts = None
+        next_sample = None
+
+        for ts, sym, bar in merge_streams(streams):
+            # sample once every bar at the previous timestamp has been applied
+            if ts != last_ts and last_ts is not None and last_ts >= next_sample:
+                eq_ts.append(last_ts)
+                eq_val.append(self.equity)
+                next_sample = last_ts - last_ts % self.equity_every + self.equity_every
+            if next_sample is None:
+                next_sample = ts
+            last_ts = ts
+            self._on_bar(ts, bar, slots[sym], trades)
+        if last_ts is not None:
+            eq_ts.append(last_ts)
+            eq_val.append(self.equity)
+
+        equity = pd.Series(eq_val, index=pd.to_datetime(np.array(eq_ts, dtype=np.int64), unit="ms"))
+        return pd.DataFrame(trades), equity
+
+    @property
+    def equity(self) -> float:
+        return self.balance + self._unrealised
+
+    def _on_bar(self, ts: int, bar: dict, slots: list, trades: list) -> None:
+        sym = slots[0].symbol
+        open_, high, low, close = bar["open"], bar["high"], bar["low"], bar["close"]
+        self._revalue(sym, open_)
+
+        # orders from the previous bar fill at this open, exits first
+        for slot in slots:
+            if slot.pending == 2:
+                self._close(slot, open_, bar, ts, trades)
+        for slot in slots:
+            if slot.pending in (1, -1):
+                self._open(slot, bar, ts)
+            slot.pending = 0
+
+        for slot in slots:
+            if slot.side == 0:
+                continue
+            if slot.held > 0 and slot.stop is not None:
+                s, t = slot.stop, slot.take
+                if slot.side == 1:
+                    hit = s if low <= s else t if high >= t else None
+                else:
+                    hit = s if high >= s else t if low <= t else None
+                if hit is not None:
+                    self._revalue(sym, hit)
+                    self._close(slot, hit, bar, ts, trades)
+                    continue
+            slot.held += 1
+
+        self._revalue(sym, close)
+        for slot in slots:
+            signal = slot.strat.on_bar(ts, bar)
+            if slot.side == 0:
+                if signal != 0:
+                    slot.pending = signal
+                    rng = getattr(slot.strat, "last_range", 0.0)
+                    slot.pending_range = rng if rng == rng else 0.0
+            elif signal == -slot.side or slot.held >= self.max_hold:
+                slot.pending = 2
+
+    def _revalue(self, sym: str, price: float) -> None:
+        last = self._mark.get(sym)
+        if last is not None:
+            self._unrealised += self._net_qty[sym] * (price - last)
+        self._mark[sym] = price
+
+    def _fee(self, strat, bar: dict) -> float:
+        if bar.get("spread", 0) < strat.maker_spread_threshold:
+            return strat.taker_fee_bp / 10000
+        return 0.0
+
+    def _open(self, slot: _Slot, bar: dict, ts: int) -> None:
+        if self.max_positions is not None and self.open_count >= self.max_positions:
+            self.rejected["max_positions"] += 1
+            return
+        if self.max_per_symbol is not None and self._per_symbol[slot.symbol] >= self.max_per_symbol:
+            self.rejected["max_per_symbol"] += 1
+            return
+        strat = slot.strat
+        side = slot.pending
+        weight = self.allocation * getattr(strat, "risk_mult", 1.0)
+        notional = self.equity * weight
+        margin = notional / self.leverage
+        if notional <= 0 or self.margin + margin > self.equity:
+            self.rejected["margin"] += 1
+            return
+        open_ = bar["open"]
+        price = open_ * (1 + strat.slippage_bp / 10000 * side)
+        qty = side * notional / price
+        slot.fee = self._fee(strat, bar) * notional
+        self.balance -= slot.fee
+        self.margin += margin
+        self.open_count += 1
+        self._per_symbol[slot.symbol] += 1
+        self._net_qty[slot.symbol] += qty
+        # the fill price differs from the mark by the slippage
+        self._unrealised += qty * (open_ - price)
+        rng = slot.pending_range
+        slot.side, slot.qty, slot.entry_price, slot.entry_ts = side, qty, price, ts
+        slot.held, slot.margin, slot.weight = 0, margin, weight
+        slot.stop = price - side * 0.5 * rng if rng else None
+        slot.take = price + side * 1.0 * rng if rng else None
+
+    def _close(self, slot: _Slot, at: float, bar: dict, ts: int, trades: list) -> None:
+        strat = slot.strat
+        fee_rate = self._fee(strat, bar)
+        price = at * (1 - strat.slippage_bp / 10000 * slot.side)
+        fee = fee_rate * abs(slot.qty) * price
+        gross = slot.qty * (price - slot.entry_price)
+        # unrealised holds qty * (mark - entry); swap it for the realised value
+        self._unrealised -= slot.qty * (self._mark[slot.symbol] - slot.entry_price)
+        self.balance += gross - fee
+        self.margin -= slot.margin
+        self.open_count -= 1
+        self._per_symbol[slot.symbol] -= 1
+        self._net_qty[slot.symbol] -= slot.qty
+        if self.open_count == 0:
+            # drop rounding left over from the incremental revaluation
+            self._unrealised = 0.0
+        trades.append({
+            "strategy": slot.name,
+            "symbol": slot.symbol,
+            "entry_time": pd.Timestamp(slot.entry_ts, unit="ms"),
+            "exit_time": pd.Timestamp(ts, unit="ms"),
+            "position": slot.side,
+            "qty": slot.qty,
+            "entry_price": slot.entry_price,
+            "exit_price": price,
+            "pnl": slot.side * (price - slot.entry_price) - fee_rate * (slot.entry_price + price),
+            "pnl_value": gross - fee - slot.fee,
+            "weight": slot.weight,
+        })
+        slot.side, slot.qty, slot.held, slot.stop, slot.take = 0, 0.0, 0, None, None
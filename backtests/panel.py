@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class Panel:
+    """Bars for many symbols on one shared time grid.
+
+    Each field is a ``(symbols, bars)`` float array with NaN where a symbol
+    has no bar; ``mask`` marks the grid slots holding a real bar.
+    """
+
+    symbols: list[str]
+    index: pd.DatetimeIndex
+    fields: dict[str, np.ndarray]
+    mask: np.ndarray
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame], columns=None) -> "Panel":
+        """Align per-symbol frames (as returned by ``load_data``) on one grid."""
+        symbols = list(frames)
+        index = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))))
+        if columns is None:
+            columns = []
+            for df in frames.values():
+                columns += [c for c in df.columns if c not in columns]
+        fields = {c: np.full((len(symbols), len(index)), np.nan) for c in columns}
+        mask = np.zeros((len(symbols), len(index)), dtype=bool)
+        for i, sym in enumerate(symbols):
+            df = frames[sym]
+            pos = index.get_indexer(df.index)
+            mask[i, pos] = True
+            for c in columns:
+                if c in df.columns:
+                    fields[c][i, pos] = df[c].to_numpy(float)
+        return cls(symbols, index, fields, mask)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Return the bars of one symbol as a DataFrame, missing slots dropped."""
+        i = self.symbols.index(symbol)
+        m = self.mask[i]
+        return pd.DataFrame(
+            {c: a[i, m] for c, a in self.fields.items()}, index=self.index[m]
+        )
+
+    def compact(self, values: np.ndarray) -> np.ndarray:
+        """Shift each row's valid bars to the left, padding the tail with NaN.
+
+        Rolling windows over the result count bars rather than grid slots,
+        matching per-symbol computations. :meth:`expand` reverses it.
+        """
+        order = np.argsort(~self.mask, axis=1, kind="stable")
+        out = np.take_along_axis(values.astype(float), order, axis=1)
+        out[np.arange(out.shape[1]) >= self.mask.sum(axis=1)[:, None]] = np.nan
+        return out
+
+    def expand(self, values: np.ndarray, fill=np.nan) -> np.ndarray:
+        """Scatter a compacted array back onto the grid."""
+        order = np.argsort(~self.mask, axis=1, kind="stable")
+        out = np.full(self.mask.shape, fill, dtype=values.dtype)
+        valid = np.arange(values.shape[1]) < self.mask.sum(axis=1)[:, None]
+        np.put_along_axis(out, order, np.where(valid, values, fill), axis=1)
+        return out
+
+    @property
+    def ts_ms(self) -> np.ndarray:
+        return self.index.as_unit("ms").asi8
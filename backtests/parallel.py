@@ -0,0 +1,138 @@
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+import pandas as pd
+
+from backtests.barframe import BarFrame
+
+# bars re-simulated at a time when a slice starts inside an open trade;
+# positions are held for at most 120 bars, so one chunk is usually enough
+STITCH_CHUNK = 256
+
+
+def _slice(df, start: int, stop: int):
+    if isinstance(df, BarFrame):
+        return BarFrame(df.ts[start:stop], {c: df[c][start:stop] for c in df.columns})
+    return df.iloc[start:stop]
+
+
+def _run_slice(args):
+    strat, df, signals = args
+    trades, _, state = strat.simulate_from(df, signals=signals)
+    return trades, state
+
+
+def _positions(index: pd.DatetimeIndex, trades: pd.DataFrame, state, stop: int):
+    """Global ``(entry, exit)`` bar numbers of the trades plus any open position.
+
+    ``stop`` is the bar after the last one simulated; an open position gets
+    it as its exit.
+    """
+    if len(trades):
+        entry = index.get_indexer(trades["entry_time"])
+        exit_ = index.get_indexer(trades["exit_time"])
+    else:
+        entry = exit_ = np.empty(0, dtype=np.intp)
+    if state.position != 0:
+        entry = np.append(entry, stop - state.held)
+        exit_ = np.append(exit_, stop)
+    return entry, exit_
+
+
+def _open_after(entry, exit_, start: int, stop: int) -> np.ndarray:
+    """Whether a position is open after each bar in ``[start, stop)``."""
+    bars = np.arange(start, stop)
+    if not len(entry):
+        return np.zeros(len(bars), dtype=bool)
+    k = np.searchsorted(entry, bars, side="right") - 1
+    return (k >= 0) & (bars < exit_[np.maximum(k, 0)])
+
+
+def simulate_parallel(strat, df, slices: int = None, workers: int = None, signals=None) -> tuple:
+    """:meth:`Strategy.simulate` over time slices run in parallel processes.
+
+    Signals are generated once over the whole range, so every slice sees
+    fully warmed-up indicators. Each slice is then simulated from a flat
+    position. Trade decisions do not depend on cash, so a slice's trades are
+    exact wherever the serial run would also be flat at its start. When a
+    slice starts inside an open trade, its bars are re-simulated serially
+    from the true state until both runs are flat after the same bar.
+    Equity is then rebuilt from the stitched trades with the same float
+    operations as the serial loop, so the result is identical to
+    ``strat.simulate(df, signals)``.
+    """
+    workers = workers or cpu_count()
+    slices = slices or workers
+    n = len(df)
+    if signals is None:
+        signals = strat.generate_signals(df)
+    signals = np.asarray(signals)
+    if slices <= 1 or n < 2 * slices:
+        return strat.simulate(df, signals)
+
+    bounds = np.linspace(0, n, slices + 1).astype(int)
+    tasks = [
+        (strat, _slice(df, a, b), signals[a:b]) for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+    with Pool(min(workers, slices)) as pool:
+        results = pool.map(_run_slice, tasks)
+
+    index = df.index
+    pieces = []
+    state = None
+    for (a, b), (trades, end_state) in zip(zip(bounds[:-1], bounds[1:]), results):
+        if state is None or state.position == 0:
+            pieces.append(trades)
+            state = end_state
+            continue
+        entry, exit_ = _positions(index, trades, end_state, b)
+        slice_open = _open_after(entry, exit_, a, b)
+        i = a
+        while i < b:
+            j = min(i + STITCH_CHUNK, b)
+            s_trades, _, s_state = strat.simulate_from(_slice(df, i, j), state, signals[i:j])
+            s_entry, s_exit = _positions(index, s_trades, s_state, j)
+            flat = ~_open_after(s_entry, s_exit, i, j) & ~slice_open[i - a:j - a]
+            if flat.any():
+                # from here on both runs take the same decisions
+                c = i + int(flat.argmax())
+                pieces.append(s_trades[s_exit[:len(s_trades)] <= c])
+                pieces.append(trades[entry[:len(trades)] > c])
+                state = end_state
+                break
+            pieces.append(s_trades)
+            state = s_state
+            i = j
+
+    pieces = [p for p in pieces if len(p)]
+    trades = pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame()
+    equity = _rebuild_equity(df, index, trades, state)
+    if isinstance(df, BarFrame):
+        return trades, BarFrame(df.ts, {"equity": equity})
+    return trades, pd.Series(equity, index=index)
+
+
+def _rebuild_equity(df, index, trades: pd.DataFrame, state) -> np.ndarray:
+    n = len(df)
+    entry, exit_ = _positions(index, trades, state, n)
+    position = trades["position"].tolist() if len(trades) else []
+    entry_price = trades["entry_price"].tolist() if len(trades) else []
+    # compound cash trade by trade exactly as the serial loop does
+    cash_levels = [1.0]
+    for pnl, price in zip(trades["pnl"].tolist() if len(trades) else [], entry_price):
+        cash_levels.append(cash_levels[-1] * (1 + pnl / price))
+    if state.position != 0:
+        position.append(state.position)
+        entry_price.append(state.entry_price)
+
+    bars = np.arange(n)
+    cash = np.asarray(cash_levels)[np.searchsorted(exit_[:len(trades)], bars, side="right")]
+    held = _open_after(entry, exit_, 0, n)
+    k = np.searchsorted(entry, bars[held], side="right") - 1
+    pos = np.asarray(position, dtype=float)[k]
+    ent = np.asarray(entry_price, dtype=float)[k]
+    close = np.asarray(df["close"], dtype=np.float64)[held]
+    equity = cash.copy()
+    mtm = pos * (close - ent)
+    equity[held] = cash[held] * (1 + mtm / ent)
+    return equity
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 525600  # minute bars, as in sharpe_ratio
+
+
+def _years(index) -> float:
+    if len(index) < 2:
+        return 0.0
+    return (index[-1] - index[0]).days / 365.25
+
+
+def _cagr(growth: np.ndarray, years: float) -> np.ndarray:
+    if years <= 0:
+        return np.zeros_like(growth)
+    return growth ** (1 / years) - 1
+
+
+def _kelly(pnl: np.ndarray) -> np.ndarray:
+    """Row-wise :func:`backtests.core.kelly_fraction` for a 2-D pnl array."""
+    wins = pnl > 0
+    losses = pnl < 0
+    n_win = wins.sum(axis=1)
+    n_loss = losses.sum(axis=1)
+    w = n_win / pnl.shape[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = np.where(wins, pnl, 0).sum(axis=1) / n_win
+        loss = np.where(losses, -pnl, 0).sum(axis=1) / n_loss
+        pr = np.where(n_loss == 0, np.inf, gain / loss)
+        kelly = w - (1 - w) / pr
+    kelly = np.where((n_win == 0) | ~(pr > 0), 0.0, kelly)
+    return np.maximum(kelly, 0.0)
+
+
+def _weights(trades: pd.DataFrame) -> np.ndarray:
+    """Share of equity each trade committed; all of it without a ``weight`` column."""
+    if "weight" in trades:
+        return trades["weight"].to_numpy(float)
+    return np.ones(len(trades))
+
+
+def trade_path_metrics(pnl: np.ndarray, entry: np.ndarray, years: float) -> dict:
+    """Metrics for paths of trades compounded as in :meth:`Strategy.simulate`.
+
+    ``pnl`` and ``entry`` are ``(paths, trades)`` arrays. Sharpe is per
+    trade, annualised by the number of trades per year.
+    """
+    rets = pnl / entry
+    equity = np.cumprod(1 + rets, axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+    n = rets.shape[1]
+    std = rets.std(axis=1, ddof=1) if n > 1 else np.zeros(len(rets))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(
+            std > 0, rets.mean(axis=1) / std * np.sqrt(n / years if years > 0 else 0), 0.0
+        )
+    return {
+        "cagr": _cagr(equity[:, -1], years),
+        "maxdd": np.minimum((equity / peak - 1).min(axis=1), 0.0),
+        "sharpe": sharpe,
+        "kelly": _kelly(pnl),
+    }
+
+
+def shuffle_trades(
+    trades: pd.DataFrame, n_paths: int, years: float, rng: np.random.Generator
+) -> dict:
+    """Max drawdown over random orderings of the same trades.
+
+    Reordering leaves final equity, and so CAGR, Sharpe and Kelly, unchanged
+    on every path, so only the path-dependent drawdown is returned.
+    """
+    perm = rng.permuted(np.tile(np.arange(len(trades)), (n_paths, 1)), axis=1)
+    pnl = (trades["pnl"].to_numpy(float) * _weights(trades))[perm]
+    entry = trades["entry_price"].to_numpy(float)[perm]
+    return {"maxdd": trade_path_metrics(pnl, entry, years)["maxdd"]}
+
+
+def perturb_costs(
+    trades: pd.DataFrame,
+    n_paths: int,
+    years: float,
+    rng: np.random.Generator,
+    extra_bp: float = 2.0,
+) -> dict:
+    """Charge each path an extra per-side cost drawn from ``U(0, extra_bp)``.
+
+    The cost is applied to entry and exit notional the same way
+    :meth:`Strategy.simulate` charges its taker fee.
+    """
+    entry = trades["entry_price"].to_numpy(float)
+    exit_ = trades["exit_price"].to_numpy(float)
+    cost = rng.uniform(0, extra_bp, (n_paths, 1)) / 10000
+    pnl = (trades["pnl"].to_numpy(float) - cost * (entry + exit_)) * _weights(trades)
+    return trade_path_metrics(pnl, np.broadcast_to(entry, pnl.shape), years)
+
+
+def _block_stats(rets: np.ndarray, block: int) -> dict:
+    """Summaries of each non-overlapping block of returns.
+
+    Holds enough to compound blocks in any order and still recover the
+    exact minute-level drawdown, mean and variance of the path.
+    """
+    r = rets.reshape(-1, block)
+    logc = np.cumsum(np.log1p(r), axis=1)
+    peak = np.maximum.accumulate(np.maximum(logc, 0.0), axis=1)
+    return {
+        "log": logc[:, -1],
+        "max": np.maximum(logc.max(axis=1), 0.0),
+        "min": logc.min(axis=1),
+        "dd": (peak - logc).max(axis=1),
+        "sum": r.sum(axis=1),
+        "sumsq": (r * r).sum(axis=1),
+    }
+
+
+def _block_path_metrics(stats: dict, order: np.ndarray, block: int, years: float) -> dict:
+    """Metrics of paths built by concatenating blocks in ``order`` (paths x blocks).
+
+    ``kelly_continuous`` is the growth-optimal leverage ``mean / var`` of
+    per-bar returns, not the win-rate/payoff Kelly of the trade methods.
+    """
+    # log level at the end of each block, and before it
+    end = np.cumsum(stats["log"][order], axis=1)
+    start = np.zeros_like(end)
+    start[:, 1:] = end[:, :-1]
+    # running peak before each block, starting from the initial level 0
+    top = np.maximum.accumulate(start + stats["max"][order], axis=1)
+    peak = np.zeros_like(end)
+    peak[:, 1:] = np.maximum(top[:, :-1], 0.0)
+    mdd = np.maximum(stats["dd"][order], peak - start - stats["min"][order]).max(axis=1)
+    mdd = np.maximum(mdd, 0.0)
+    level = end[:, -1]
+    n = order.shape[1] * block
+    s = stats["sum"][order].sum(axis=1)
+    sq = stats["sumsq"][order].sum(axis=1)
+    mean = s / n
+    var = (sq - n * mean * mean) / (n - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, np.sqrt(PERIODS_PER_YEAR) * mean / std, 0.0)
+        kelly = np.where(var > 0, mean / var, 0.0)
+    return {
+        "cagr": _cagr(np.exp(level), years),
+        "maxdd": np.expm1(-mdd),
+        "sharpe": sharpe,
+        "kelly_continuous": kelly,
+    }
+
+
+def block_bootstrap(
+    equity: pd.Series, n_paths: int, rng: np.random.Generator, block: int = 1440
+) -> dict:
+    """Resample blocks of per-bar returns with replacement.
+
+    Returns are split into non-overlapping blocks of ``block`` bars (the
+    oldest ``len % block`` returns are dropped) and each path draws as many
+    blocks as the original. With no trades to count, Kelly is reported as
+    ``kelly_continuous``, the ``mean / var`` of per-bar returns.
+    """
+    rets = equity.pct_change().dropna().to_numpy(float)
+    block = max(1, min(block, len(rets)))
+    n_blocks = len(rets) // block
+    if n_blocks == 0:
+        return {m: np.zeros(n_paths) for m in ("cagr", "maxdd", "sharpe", "kelly_continuous")}
+    rets = rets[len(rets) - n_blocks * block:]
+    stats = _block_stats(rets, block)
+    order = rng.integers(0, n_blocks, (n_paths, n_blocks))
+    return _block_path_metrics(stats, order, block, _years(equity.index))
+
+
+def summarize(metrics: dict, levels=(0.05, 0.5, 0.95)) -> pd.DataFrame:
+    """Quantiles and mean of each metric across paths."""
+    rows = {}
+    for name, values in metrics.items():
+        q = np.quantile(values, levels)
+        rows[name] = {**{f"p{int(l * 100):02d}": v for l, v in zip(levels, q)},
+                      "mean": values.mean()}
+    return pd.DataFrame(rows).T
+
+
+def robustness_report(
+    trades: pd.DataFrame,
+    equity: pd.Series,
+    n_paths: int = 10000,
+    block: int = 1440,
+    extra_bp: float = 2.0,
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """Confidence intervals for CAGR, max drawdown, Sharpe and Kelly.
+
+    Combines trade-order shuffles, cost perturbations and a block bootstrap
+    of ``equity`` returns, indexed by ``(method, metric)``. Trades are
+    compounded on the whole account unless a ``weight`` column gives the
+    share of equity each one committed, as :class:`EventEngine` records.
+    """
+    rng = np.random.default_rng(seed)
+    years = _years(equity.index)
+    parts = {}
+    if len(trades):
+        parts["shuffle"] = summarize(shuffle_trades(trades, n_paths, years, rng))
+        parts["costs"] = summarize(perturb_costs(trades, n_paths, years, rng, extra_bp))
+    if len(equity) > 1:
+        parts["bootstrap"] = summarize(block_bootstrap(equity, n_paths, rng, block))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, names=["method", "metric"])
@@ -1,9 +1,16 @@
 import argparse
+import os
 from importlib import import_module
 import warnings
+import numpy as np
 import pandas as pd
-from backtests.core import cagr, max_drawdown, sharpe_ratio, win_rate, payoff_ratio
-from utils.db import db_conn
+from backtests.barframe import BarFrame
+from backtests.parallel import simulate_parallel
+from backtests.core import SimState, cagr, max_drawdown, sharpe_ratio, win_rate, payoff_ratio
+from backtests.robustness import robustness_report
+from backtests.signal_cache import default_cache
+from utils import packed
+from utils.db import pooled_conn
 
 warnings.filterwarnings(
     "ignore",
@@ -25,6 +32,8 @@ def load_data(conn, symbol: str, start: str, end: str, with_index: bool = False)
     )
     start_ts = int(pd.Timestamp(start).timestamp() * 1000)
     end_ts = int(pd.Timestamp(end).timestamp() * 1000)
+    if packed.enabled():
+        return _load_packed_frame(conn, symbol, start_ts, end_ts, with_index)
     df = pd.read_sql(query, conn, params=(symbol, start_ts, end_ts))
     df["ts"] = pd.to_datetime(df.ts, unit="ms")
     df.set_index("ts", inplace=True)
@@ -41,6 +50,126 @@ def load_data(conn, symbol: str, start: str, end: str, with_index: bool = False)
     return df
 
 
+def _load_packed_frame(conn, symbol, start_ts, end_ts, with_index):
+    ts, ohlc = packed.load_packed(conn, "mark1", symbol, start_ts, end_ts)
+    index = pd.Index(pd.to_datetime(ts, unit="ms"), name="ts")
+    df = pd.DataFrame(ohlc, index=index, columns=["open", "high", "low", "close"])
+    if with_index:
+        idx_ts, idx_ohlc = packed.load_packed(conn, "index1", symbol, start_ts, end_ts)
+        idx = pd.Series(idx_ohlc[:, 3], index=pd.to_datetime(idx_ts, unit="ms"), name="index_close")
+        df = df.join(idx, how="left")
+    return df
+
+
+def load_bars(conn, symbol: str, start: str, end: str, with_index: bool = False,
+              dtype=np.float64) -> BarFrame:
+    """Load OHLC data from MySQL mark1 table into a :class:`BarFrame`.
+
+    Same rows as :func:`load_data` without building a DataFrame. Pass
+    ``dtype=np.float32`` to halve the memory used by prices.
+    """
+    query = (
+        "SELECT startTime, open, high, low, close FROM mark1 "
+        "WHERE symbol=%s AND startTime BETWEEN %s AND %s ORDER BY startTime"
+    )
+    start_ts = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ts = int(pd.Timestamp(end).timestamp() * 1000)
+    if packed.enabled():
+        ts, ohlc = packed.load_packed(conn, "mark1", symbol, start_ts, end_ts)
+        ohlc = ohlc.astype(dtype)
+    else:
+        with conn.cursor() as cur:
+            cur.execute(query, (symbol, start_ts, end_ts))
+            rows = cur.fetchall()
+        ts = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        ohlc = np.array([r[1:] for r in rows], dtype=dtype).reshape(-1, 4)
+    bars = BarFrame(ts, {c: ohlc[:, k] for k, c in enumerate(("open", "high", "low", "close"))})
+    if with_index:
+        if packed.enabled():
+            idx_ts, idx_ohlc = packed.load_packed(conn, "index1", symbol, start_ts, end_ts)
+            idx_close = idx_ohlc[:, 3].astype(dtype)
+        else:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT startTime, close FROM index1 "
+                    "WHERE symbol=%s AND startTime BETWEEN %s AND %s ORDER BY startTime",
+                    (symbol, start_ts, end_ts),
+                )
+                idx_rows = cur.fetchall()
+            idx_ts = np.fromiter((r[0] for r in idx_rows), dtype=np.int64, count=len(idx_rows))
+            idx_close = np.array([r[1] for r in idx_rows], dtype=dtype)
+        index_close = np.full(len(ts), np.nan, dtype=dtype)
+        # left join on startTime, as load_data does
+        pos = np.searchsorted(idx_ts, ts)
+        found = pos < len(idx_ts)
+        found[found] = idx_ts[pos[found]] == ts[found]
+        index_close[found] = idx_close[pos[found]]
+        bars["index_close"] = index_close
+    return bars
+
+
+def iter_bars(conn, symbol: str, start: str, end: str, with_index: bool = False,
+              chunk: pd.Timedelta = pd.Timedelta(days=7)):
+    """Yield ``(ts_ms, bar)`` pairs from mark1, loading one ``chunk`` at a time.
+
+    Memory stays bounded by the chunk size however long the range is.
+    """
+    t = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    step = pd.Timedelta(milliseconds=1)
+    while t <= end:
+        stop = min(t + chunk - step, end)
+        bars = load_bars(conn, symbol, t, stop, with_index=with_index)
+        cols = bars.columns
+        values = [bars[c].tolist() for c in cols]
+        for i, ts in enumerate(bars.ts.tolist()):
+            yield ts, {c: v[i] for c, v in zip(cols, values)}
+        t = stop + step
+
+
+def load_funding(conn, symbol: str, start: str, end: str) -> pd.Series:
+    """Load settled 8h funding rates from the MySQL funding8h table."""
+    query = (
+        "SELECT startTime AS ts, fundingRate FROM funding8h "
+        "WHERE symbol=%s AND startTime BETWEEN %s AND %s ORDER BY startTime"
+    )
+    start_ts = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ts = int(pd.Timestamp(end).timestamp() * 1000)
+    df = pd.read_sql(query, conn, params=(symbol, start_ts, end_ts))
+    df["ts"] = pd.to_datetime(df.ts, unit="ms")
+    return df.set_index("ts")["fundingRate"].astype(float)
+
+
+def extend_backtest(strat, bars: BarFrame, state_dir: str) -> tuple:
+    """Continue the backtest stored in ``state_dir`` over ``bars``.
+
+    ``state.pkl`` holds the :class:`SimState` of the last run; the new
+    trades and equity are appended to ``trades.csv`` and ``equity.csv``.
+    Returns the complete trades and equity read back from those files.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    state_path = os.path.join(state_dir, "state.pkl")
+    trades_path = os.path.join(state_dir, "trades.csv")
+    equity_path = os.path.join(state_dir, "equity.csv")
+    state = SimState.load(state_path) if os.path.exists(state_path) else None
+    trades, equity, state = strat.simulate_from(bars, state)
+    if len(trades):
+        trades.to_csv(trades_path, mode="a", header=not os.path.exists(trades_path), index=False)
+    equity.series("equity").rename_axis("ts").to_csv(
+        equity_path, mode="a", header=not os.path.exists(equity_path)
+    )
+    # state last, so a crash before it only repeats this run's bars
+    state.save(state_path)
+    if os.path.exists(trades_path):
+        trades = pd.read_csv(
+            trades_path, parse_dates=["entry_time", "exit_time"], float_precision="round_trip"
+        )
+    equity = pd.read_csv(
+        equity_path, index_col="ts", parse_dates=True, float_precision="round_trip"
+    )["equity"]
+    return trades, equity
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run backtest")
     parser.add_argument('--symbol', required=True)
@@ -53,11 +182,35 @@ def main():
                         help='Range threshold as decimal percentage')
     parser.add_argument('--breakout-thr', type=float, default=0.0005,
                         help='Breakout threshold as decimal percentage')
+    parser.add_argument('--float32', action='store_true',
+                        help='Hold prices as float32 to reduce memory')
+    parser.add_argument('--mc-paths', type=int, default=0,
+                        help='Monte Carlo paths for robustness intervals (0 disables)')
+    parser.add_argument('--time-weighted-funding', action='store_true',
+                        help='funding_carry: predict from the time-weighted window premium')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Regenerate signals instead of using the signal cache')
+    parser.add_argument('--state-dir',
+                        help='Resume from and append to the backtest saved here')
+    parser.add_argument('--slices', type=int, default=1,
+                        help='Simulate this many time slices in parallel processes')
     args = parser.parse_args()
 
-    conn = db_conn()
-    df = load_data(conn, args.symbol, args.start, args.end, with_index=args.strategy == 'funding_carry')
-    conn.close()
+    start = args.start
+    state_path = os.path.join(args.state_dir, 'state.pkl') if args.state_dir else None
+    if state_path and os.path.exists(state_path):
+        # only the bars after the saved state are needed
+        start = str(pd.Timestamp(SimState.load(state_path).last_ts + 60_000, unit='ms'))
+
+    with pooled_conn() as conn:
+        df = load_bars(
+            conn,
+            args.symbol,
+            start,
+            args.end,
+            with_index=args.strategy == 'funding_carry',
+            dtype=np.float32 if args.float32 else np.float64,
+        )
 
     module = import_module(f"strategies.{args.strategy}")
     cls = getattr(module, ''.join([p.capitalize() for p in args.strategy.split('_')]))
@@ -67,12 +220,22 @@ def main():
             breakout_threshold=args.breakout_thr,
             risk_mult=args.risk_mult,
         )
+    elif args.strategy == 'funding_carry':
+        strat = cls(time_weighted=args.time_weighted_funding)
     elif 'risk_mult' in cls.__init__.__code__.co_varnames:
         strat = cls(risk_mult=args.risk_mult)
     else:
         strat = cls()
 
-    trades, equity = strat.simulate(df)
+    if args.state_dir:
+        trades, equity = extend_backtest(strat, df, args.state_dir)
+    else:
+        cache = None if args.no_cache else default_cache()
+        signals = cache.signals(strat, args.symbol, df) if cache else None
+        if args.slices > 1:
+            trades, equity = simulate_parallel(strat, df, slices=args.slices, signals=signals)
+        else:
+            trades, equity = strat.simulate(df, signals)
 
     print(f"Trades: {len(trades)}")
     print(f"CAGR: {cagr(equity):.2%}")
@@ -80,6 +243,13 @@ def main():
     print(f"Sharpe: {sharpe_ratio(equity):.2f}")
     print(f"Win rate: {win_rate(trades):.2%}")
     print(f"Payoff ratio: {payoff_ratio(trades):.2f}")
+    if args.mc_paths > 0:
+        print()
+        print(f"Robustness ({args.mc_paths} paths):")
+        if isinstance(equity, BarFrame):
+            equity = equity.series('equity')
+        report = robustness_report(trades, equity, n_paths=args.mc_paths)
+        print(report.to_string())
 
 
 if __name__ == '__main__':
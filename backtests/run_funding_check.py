@@ -0,0 +1,37 @@
+import argparse
+
+import numpy as np
+
+from backtests.run_backtest import load_bars, load_funding
+from utils.db import pooled_conn
+from utils.funding import compare_to_settled, settlement_estimates
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare time-weighted funding estimates with settled funding8h rates"
+    )
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    args = parser.parse_args()
+
+    for symbol in args.symbols:
+        with pooled_conn() as conn:
+            bars = load_bars(conn, symbol, args.start, args.end, with_index=True)
+            settled = load_funding(conn, symbol, args.start, args.end)
+        est = settlement_estimates(bars.ts, bars["close"], bars["index_close"])
+        cmp = compare_to_settled(est, settled).dropna()
+        if cmp.empty:
+            print(f"{symbol}: no complete settlement windows")
+            continue
+        sign = np.mean(np.sign(cmp["estimated"]) == np.sign(cmp["settled"]))
+        print(f"{symbol}: {len(cmp)} settlements")
+        print(f"  mean abs error: {cmp['error'].abs().mean():.6%}")
+        print(f"  max abs error:  {cmp['error'].abs().max():.6%}")
+        print(f"  correlation:    {cmp['estimated'].corr(cmp['settled']):.3f}")
+        print(f"  sign agreement: {sign:.1%}")
+
+
+if __name__ == "__main__":
+    main()
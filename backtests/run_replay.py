@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backtests.core import Strategy
+from backtests.run_backtest import load_data, load_funding
+from live_bot import LiveBot
+from utils.db import pooled_conn
+
+
+class SimClock:
+    """Simulated wall clock whose ``sleep`` returns immediately.
+
+    Before advancing, ``sleep`` awaits ``idle`` (if set) so pending work,
+    such as queued orders, completes at the simulated time it was issued.
+    """
+
+    def __init__(self, now: float, idle=None):
+        self.now = now
+        self.idle = idle
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        if self.idle is not None:
+            await self.idle()
+        self.now += max(delay, 0.0)
+        await asyncio.sleep(0)
+
+
+class FakeExchange:
+    """Stand-in for :mod:`utils.bybit` replaying historical bars.
+
+    Prices are the close of the last minute bar completed at the simulated
+    time. Orders fill immediately at the requested price using the same
+    slippage and taker fee as :meth:`Strategy.simulate`, and positions are
+    netted per symbol to report realised PnL (net of fees).
+    """
+
+    taker_fee_bp = Strategy.taker_fee_bp
+    slippage_bp = Strategy.slippage_bp
+
+    def __init__(self, data: dict, clock, funding: dict | None = None):
+        self.clock = clock
+        self.bars = {}
+        for sym, df in data.items():
+            self.bars[sym] = (
+                pd.DatetimeIndex(df.index).as_unit("ms").asi8,
+                df[["open", "high", "low", "close"]].to_numpy(float),
+                df["index_close"].to_numpy(float),
+            )
+        self.funding = {}
+        for sym, rates in (funding or {}).items():
+            ts = pd.DatetimeIndex(rates.index).as_unit("ms").asi8
+            self.funding[sym] = (ts, rates.to_numpy(float))
+        self.positions: dict[str, list[float]] = {}
+        self.fills: list[dict] = []
+        self._lock = threading.Lock()
+
+    def _last_bar(self, symbol: str) -> int:
+        ts, _, _ = self.bars[symbol]
+        now_ms = int(self.clock() * 1000)
+        i = int(np.searchsorted(ts, now_ms - 60_000, side="right")) - 1
+        if i < 0:
+            raise ValueError(f"No completed {symbol} bar before {now_ms}")
+        return i
+
+    def get_mark_price(self, symbol: str, net: str = None) -> float:
+        return float(self.bars[symbol][1][self._last_bar(symbol), 3])
+
+    def get_index_price(self, symbol: str, net: str = None) -> float:
+        return float(self.bars[symbol][2][self._last_bar(symbol)])
+
+    def fetch_funding(self, symbol: str, net: str = None) -> float:
+        if symbol not in self.funding:
+            return 0.0
+        ts, rates = self.funding[symbol]
+        i = int(np.searchsorted(ts, int(self.clock() * 1000), side="right")) - 1
+        return float(rates[i]) if i >= 0 else 0.0
+
+    def get_kline(self, symbol, start, end, net=None, kind="mark", limit=1000) -> list:
+        ts, ohlc, index = self.bars[symbol]
+        lo, hi = np.searchsorted(ts, [start, end + 1])
+        hi = min(hi, lo + limit)
+        if kind == "index":
+            return [[int(t), c, c, c, c] for t, c in zip(ts[lo:hi], index[lo:hi])]
+        return [[int(t), *map(float, row)] for t, row in zip(ts[lo:hi], ohlc[lo:hi])]
+
+    def _fill(self, symbol: str, side: str, qty: float, price: float) -> dict:
+        d = 1 if side == "Buy" else -1
+        fill_price = price * (1 + self.slippage_bp / 10000 * d)
+        fee = self.taker_fee_bp / 10000 * fill_price * qty
+        with self._lock:
+            pos, entry = self.positions.get(symbol, (0.0, 0.0))
+            trade = d * qty
+            realised = 0.0
+            if pos == 0 or (pos > 0) == (trade > 0):
+                entry = (pos * entry + trade * fill_price) / (pos + trade)
+            else:
+                closed = min(abs(trade), abs(pos))
+                realised = closed * np.sign(pos) * (fill_price - entry)
+                if abs(trade) > abs(pos):
+                    entry = fill_price
+            pos += trade
+            if pos == 0:
+                entry = 0.0
+            self.positions[symbol] = [pos, entry]
+            fill = {
+                "orderId": f"replay-{len(self.fills) + 1}",
+                "avgPrice": fill_price,
+                "cumExecFee": fee,
+                "realisedPnl": float(realised) - fee,
+            }
+            self.fills.append({"ts": self.clock(), "symbol": symbol, "side": side,
+                               "qty": qty, **fill})
+        return fill
+
+    def place_order_post_only(self, symbol, side, qty, price, key=None, secret=None, net=None):
+        return {"retCode": 0, "retMsg": "OK", "result": self._fill(symbol, side, qty, price)}
+
+    def place_batch_order_post_only(self, orders, key=None, secret=None, net=None):
+        results = [self._fill(o["symbol"], o["side"], o["qty"], o["price"]) for o in orders]
+        return {
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"list": results},
+            "retExtInfo": {"list": [{"code": 0, "msg": "OK"}] * len(results)},
+        }
+
+
+def replay(
+    data: dict,
+    start: str,
+    end: str,
+    risk_mult: float = 1.0,
+    funding: dict | None = None,
+    journal_dir: str | Path = "logs/replay",
+    tick_offset: float = 2.0,
+) -> tuple[LiveBot, FakeExchange]:
+    """Run :class:`LiveBot` over historical bars on a simulated clock."""
+    start_s = pd.Timestamp(start).timestamp()
+    end_s = pd.Timestamp(end).timestamp()
+    # first tick samples the close of the first bar
+    clock = SimClock(start_s + 60)
+    exchange = FakeExchange(data, clock, funding)
+    bot = LiveBot(
+        "replay",
+        list(data),
+        risk_mult,
+        tick_offset=tick_offset,
+        exchange=exchange,
+        clock=clock,
+        sleep=clock.sleep,
+        journal_dir=journal_dir,
+    )
+    clock.idle = bot.executor.drain
+    try:
+        asyncio.run(bot.run(until=end_s))
+    finally:
+        bot.stop()
+    return bot, exchange
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay LiveBot over historical bars")
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    parser.add_argument("--risk-mult", type=float, default=1.0)
+    parser.add_argument("--tick-offset", type=float, default=2.0)
+    parser.add_argument(
+        "--journal", help="Journal directory (default logs/replay_<start>_<end>)"
+    )
+    args = parser.parse_args()
+
+    with pooled_conn() as conn:
+        data = {s: load_data(conn, s, args.start, args.end, with_index=True) for s in args.symbols}
+        funding = {s: load_funding(conn, s, args.start, args.end) for s in args.symbols}
+
+    journal_dir = args.journal or (
+        f"logs/replay_{pd.Timestamp(args.start):%Y%m%d}_{pd.Timestamp(args.end):%Y%m%d}"
+    )
+    t0 = time.perf_counter()
+    bot, exchange = replay(
+        data,
+        args.start,
+        args.end,
+        risk_mult=args.risk_mult,
+        funding=funding,
+        journal_dir=journal_dir,
+        tick_offset=args.tick_offset,
+    )
+    elapsed = time.perf_counter() - t0
+    simulated = pd.Timestamp(args.end).timestamp() - pd.Timestamp(args.start).timestamp()
+    pnl = sum(f["realisedPnl"] for f in exchange.fills)
+    print(f"Fills: {len(exchange.fills)}")
+    print(f"Realised PnL: {pnl:.6f}")
+    print(f"Replayed {simulated / 86400:.1f} days in {elapsed:.1f}s "
+          f"({simulated / max(elapsed, 1e-9):,.0f}x real time)")
+    print(f"Journal written to {journal_dir}")
+
+
+if __name__ == "__main__":
+    main()
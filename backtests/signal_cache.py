@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import uuid
+from functools import lru_cache
+from importlib import import_module
+
+import numpy as np
+import pandas as pd
+
+from backtests.barframe import BarFrame
+from backtests.core import strategy_params
+
+# raw bar columns that feed signal generation; derived columns such as
+# ``range`` are left out so a frame hashes the same before and after a run
+DATA_COLUMNS = ("open", "high", "low", "close", "price", "spread", "index_close")
+
+
+@lru_cache(maxsize=None)
+def code_version(cls) -> str:
+    """Hash of the source of the modules defining ``cls`` and its bases.
+
+    Editing a strategy's module, e.g. ``generate_signals`` or a helper next
+    to it, changes the hash, as does editing a module listed in the class's
+    ``CACHE_MODULES``. Other shared code is covered by bumping the class's
+    ``CACHE_VERSION``.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    modules = [sys.modules.get(k.__module__) for k in cls.__mro__ if k is not object]
+    modules += [import_module(name) for name in getattr(cls, "CACHE_MODULES", ())]
+    for module in modules:
+        if module is None:
+            continue
+        try:
+            h.update(inspect.getsource(module).encode())
+        except (OSError, TypeError):
+            h.update(module.__name__.encode())
+    return h.hexdigest()
+
+
+def _ts_ms(index) -> np.ndarray:
+    return pd.DatetimeIndex(index).as_unit("ms").asi8
+
+
+def fingerprint(data) -> str:
+    """Hash of the bar timestamps and raw price columns of a frame or panel."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def add(name, values):
+        values = np.ascontiguousarray(values)
+        h.update(f"{name}:{values.dtype.str}:{values.shape}".encode())
+        h.update(values.tobytes())
+
+    if isinstance(data, BarFrame):
+        add("ts", data.ts)
+        cols = data
+    elif isinstance(data, pd.DataFrame):
+        add("ts", _ts_ms(data.index))
+        cols = {c: data[c].to_numpy() for c in data.columns}
+    else:  # Panel
+        add("ts", data.ts_ms)
+        add("mask", data.mask)
+        cols = data.fields
+    for c in DATA_COLUMNS:
+        if c in cols:
+            add(c, cols[c])
+    return h.hexdigest()
+
+
+class SignalCache:
+    """On-disk cache of signal arrays and the indicators computed with them.
+
+    Entries are keyed by strategy class, its ``CACHE_VERSION`` and
+    :func:`code_version`, constructor parameters, symbol and a
+    :func:`fingerprint` of the bars, so changing any of them misses. Each
+    entry is a directory of ``.npy`` files loaded with ``mmap_mode="r"``.
+    Once the cache grows past ``max_bytes`` the least recently used entries
+    are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024**3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, strat, symbol: str, data) -> str:
+        desc = {
+            "strategy": f"{type(strat).__module__}.{type(strat).__qualname__}",
+            "version": getattr(strat, "CACHE_VERSION", 0),
+            "code": code_version(type(strat)),
+            "params": strategy_params(strat),
+            "symbol": symbol,
+            "data": fingerprint(data),
+        }
+        raw = json.dumps(desc, sort_keys=True, default=repr).encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get(self, key: str):
+        """Return ``{name: array}`` for a stored entry, or ``None``."""
+        path = os.path.join(self.directory, key)
+        try:
+            names = sorted(f for f in os.listdir(path) if f.endswith(".npy"))
+            arrays = {f[:-4]: np.load(os.path.join(path, f), mmap_mode="r") for f in names}
+        except (FileNotFoundError, ValueError):
+            return None
+        # mtime of the entry directory doubles as its last-use time
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return arrays
+
+    def put(self, key: str, arrays: dict) -> None:
+        path = os.path.join(self.directory, key)
+        tmp = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(values))
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except FileNotFoundError:
+                continue
+            total += size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def signals(self, strat, symbol: str, data):
+        """Cached ``strat.generate_signals(data)`` for a DataFrame or BarFrame.
+
+        Columns the strategy adds to ``data`` (e.g. ``range``) are stored too
+        and restored onto ``data`` on a hit, so :meth:`Strategy.simulate`
+        sees the same inputs either way.
+        """
+        key = self.key(strat, symbol, data)
+        hit = self.get(key)
+        if hit is not None:
+            signal = hit.pop("signal")
+            for name, values in hit.items():
+                data[name] = values
+            if isinstance(data, pd.DataFrame):
+                return pd.Series(signal, index=data.index)
+            return signal
+        before = set(data.columns)
+        signal = strat.generate_signals(data)
+        arrays = {"signal": np.asarray(signal)}
+        for name in data.columns:
+            if name not in before:
+                arrays[name] = np.asarray(data[name])
+        self.put(key, arrays)
+        return signal
+
+    def panel_signals(self, strat, panel) -> np.ndarray:
+        """Cached ``strat.generate_panel_signals(panel)``."""
+        key = self.key(strat, ",".join(panel.symbols), panel)
+        hit = self.get(key)
+        if hit is not None:
+            signal = hit.pop("signal")
+            panel.fields.update(hit)
+            return signal
+        before = set(panel.fields)
+        signal = strat.generate_panel_signals(panel)
+        arrays = {"signal": signal}
+        for name in panel.fields:
+            if name not in before:
+                arrays[name] = panel.fields[name]
+        self.put(key, arrays)
+        return signal
+
+
+def default_cache():
+    """Cache under ``SIGNAL_CACHE_DIR``; ``None`` when it is unset or empty.
+
+    ``SIGNAL_CACHE_BYTES`` bounds its size (default 2 GiB).
+    """
+    directory = os.getenv("SIGNAL_CACHE_DIR")
+    if not directory:
+        return None
+    return SignalCache(directory, int(os.getenv("SIGNAL_CACHE_BYTES", 2 * 1024**3)))
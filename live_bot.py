@@ -1,122 +1,208 @@
 import argparse
 import asyncio
-import csv
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
 import pandas as pd
 
+from backtests.run_backtest import load_data
 from strategies.vol_breakout import VolBreakout
 from strategies.funding_carry import FundingCarry
-from utils.bybit import (
-    get_mark_price,
-    get_index_price,
-    place_order_post_only,
-    fetch_funding,
-)
+from utils import bybit
+from utils.db import pooled_conn
+from utils.executor import Order, OrderExecutor
+from utils.journal import Journal
+from utils.scheduler import MinuteScheduler
 
 
 class LiveBot:
-    def __init__(self, net: str, symbols: list[str], risk_mult: float):
+    def __init__(
+        self,
+        net: str,
+        symbols: list[str],
+        risk_mult: float,
+        order_workers: int = 4,
+        batch_size: int = 1,
+        tick_offset: float = 2.0,
+        time_weighted_funding: bool = False,
+        exchange=None,
+        clock=time.time,
+        sleep=asyncio.sleep,
+        journal_dir: str | Path = "logs/journal",
+    ):
+        """Create a bot trading ``symbols`` on ``net``.
+
+        ``exchange`` defaults to :mod:`utils.bybit`; any object exposing the
+        same price, funding and order functions can stand in for it, in
+        which case API keys are optional. ``clock``/``sleep`` drive the
+        scheduler and order timestamps. Acked orders are recorded in the
+        trade journal under ``journal_dir``. ``time_weighted_funding`` is
+        passed to :class:`FundingCarry` as ``time_weighted``.
+        """
         self.net = net
         self.symbols = symbols
         self.risk_mult = risk_mult
+        self.exchange = exchange or bybit
+        self.clock = clock
         key_var = "BYBIT_KEY_TEST" if net == "testnet" else "BYBIT_KEY"
         sec_var = "BYBIT_SECRET_TEST" if net == "testnet" else "BYBIT_SECRET"
-        self.api_key = os.getenv(key_var)
-        self.api_secret = os.getenv(sec_var)
-        if not self.api_key or not self.api_secret:
+        self.api_key = os.getenv(key_var, "")
+        self.api_secret = os.getenv(sec_var, "")
+        if exchange is None and (not self.api_key or not self.api_secret):
             raise SystemExit(f"Missing API keys in {key_var}/{sec_var}")
         self.running = True
-        self.price_hist: dict[str, pd.DataFrame] = {
-            sym: pd.DataFrame(columns=["close", "index_close"]) for sym in symbols
-        }
-        logdir = Path("logs")
-        logdir.mkdir(exist_ok=True)
-        fname = logdir / f"live_{datetime.utcnow():%Y%m%d}.csv"
-        self.log = open(fname, "a", newline="")
-        self.writer = csv.writer(self.log)
-        if self.log.tell() == 0:
-            self.writer.writerow(
-                [
-                    "timestamp",
-                    "symbol",
-                    "strategy",
-                    "side",
-                    "qty",
-                    "price",
-                    "fee",
-                    "funding",
-                    "realised_pnl",
-                ]
-            )
+        self.strategies: dict[str, list] = {}
+        for sym in symbols:
+            fc = FundingCarry(time_weighted=time_weighted_funding)
+            fc.risk_mult = risk_mult
+            self.strategies[sym] = [
+                ("vol_breakout", VolBreakout(risk_mult=risk_mult)),
+                ("funding_carry", fc),
+            ]
+        self.executor = OrderExecutor(
+            self.api_key,
+            self.api_secret,
+            net,
+            workers=order_workers,
+            batch_size=batch_size,
+            on_ack=self.on_order_ack,
+            exchange=self.exchange,
+        )
+        self.scheduler = MinuteScheduler(offset=tick_offset, clock=clock, sleep=sleep)
+        self.journal = Journal(journal_dir)
+
+    def load_history(self, symbol: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+        """Return ``close``/``index_close`` minute bars in ``[start_ms, end_ms)``.
+
+        Stored bars are read from ``mark1``/``index1`` and anything after the
+        last stored bar is fetched from the Bybit kline endpoints.
+        """
+        try:
+            with pooled_conn() as conn:
+                df = load_data(
+                    conn,
+                    symbol,
+                    pd.Timestamp(start_ms, unit="ms"),
+                    pd.Timestamp(end_ms - 1, unit="ms"),
+                    with_index=True,
+                )
+            df = df[["close", "index_close"]]
+        except Exception as exc:
+            print(f"[WARN] Could not load stored history for {symbol}: {exc}")
+            df = pd.DataFrame(columns=["close", "index_close"], dtype=float)
+
+        fill_start = start_ms
+        if not df.empty:
+            fill_start = max(fill_start, int(df.index[-1].timestamp() * 1000) + 60_000)
+        rows = []
+        while fill_start < end_ms:
+            fill_end = min(fill_start + 1000 * 60_000, end_ms) - 1
+            mark = self.exchange.get_kline(symbol, fill_start, fill_end, self.net, "mark")
+            index = {
+                r[0]: r[4]
+                for r in self.exchange.get_kline(symbol, fill_start, fill_end, self.net, "index")
+            }
+            rows += [(r[0], r[4], index.get(r[0])) for r in mark if r[0] < end_ms]
+            fill_start = fill_end + 1
+        if rows:
+            fill = pd.DataFrame(rows, columns=["ts", "close", "index_close"])
+            fill["ts"] = pd.to_datetime(fill.ts, unit="ms")
+            fill = fill.set_index("ts").astype(float)
+            df = pd.concat([df, fill]) if not df.empty else fill
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    def warm_start(self, bars: int) -> None:
+        """Feed the last ``bars`` completed minutes through every strategy.
 
-    async def run(self):
+        Signals produced while warming up are discarded; the point is to
+        fill the rolling indicators so the bot can trade on its first tick.
+        """
+        end_ms = int(self.clock() * 1000) // 60_000 * 60_000
+        start_ms = end_ms - bars * 60_000
+        for sym in self.symbols:
+            hist = self.load_history(sym, start_ms, end_ms).tail(bars)
+            for ts, close, index_close in hist.itertuples():
+                ts_ms = int(ts.timestamp() * 1000)
+                bar = {"close": close, "index_close": index_close}
+                for _, strat in self.strategies[sym]:
+                    strat.on_bar(ts_ms, bar)
+            print(f"[INFO] Warmed up {sym} with {len(hist)} bars")
+
+    async def run(self, until: float | None = None):
+        """Trade on every scheduler tick until stopped or ``until`` (epoch s)."""
         print(f"Connected to {self.net}")
         if self.net == "testnet":
             print("[INFO] Funding payouts are set to 0 on testnet – this is expected.")
-        while self.running:
-            await self.loop_once()
-            await asyncio.sleep(60)
-
-    async def loop_once(self):
-        ts = datetime.utcnow().replace(tzinfo=pd.Timestamp.utcnow().tzinfo)
-        for sym in self.symbols:
-            mark_price, index_price = await asyncio.gather(
-                asyncio.to_thread(get_mark_price, sym, self.net),
-                asyncio.to_thread(get_index_price, sym, self.net),
+        self.executor.start()
+        try:
+            async for tick in self.scheduler.ticks():
+                if not self.running or (until is not None and tick.scheduled >= until):
+                    break
+                if tick.skipped:
+                    print(f"[WARN] Skipped {tick.skipped} late tick(s)")
+                await self.loop_once(tick.scheduled)
+        finally:
+            await self.executor.stop()
+            stats = self.executor.latency_stats()
+            print(
+                f"[INFO] {stats['count']} orders acked, signal-to-ack latency "
+                f"mean {stats['mean_ms']:.1f} ms, max {stats['max_ms']:.1f} ms"
+            )
+            stats = self.scheduler.stats()
+            print(
+                f"[INFO] {stats['fired']} ticks fired, {stats['skipped']} skipped, "
+                f"lateness mean {stats['mean_late_ms']:.1f} ms, "
+                f"max {stats['max_late_ms']:.1f} ms"
             )
-            df = self.price_hist[sym]
-            df.loc[ts, "close"] = mark_price
-            df.loc[ts, "index_close"] = index_price
-            df = df.tail(60)
-            self.price_hist[sym] = df
-            vb = VolBreakout(risk_mult=self.risk_mult)
-            fc = FundingCarry()
-            fc.risk_mult = self.risk_mult
-            vb_data = df[["close"]].copy()
-            fc_data = df[["close", "index_close"]].copy()
-            for strat, name, data in [
-                (vb, "vol_breakout", vb_data),
-                (fc, "funding_carry", fc_data),
-            ]:
-                signals = strat.generate_signals(data)
-                if signals.empty:
-                    continue
-                signal = signals.iloc[-1]
-                if signal == 0:
-                    continue
-                side = "Buy" if signal > 0 else "Sell"
-                qty = getattr(strat, "risk_mult", 1.0)
-                place_order_post_only(
-                    sym,
-                    side,
-                    qty,
-                    mark_price,
-                    self.api_key,
-                    self.api_secret,
-                    self.net,
-                )
-                funding = fetch_funding(sym, self.net)
-                self.writer.writerow(
-                    [
-                        ts.isoformat(),
-                        sym,
-                        name,
-                        side,
-                        qty,
-                        mark_price,
-                        0,
-                        funding,
-                        0,
-                    ]
-                )
-                self.log.flush()
+
+    async def loop_once(self, scheduled: float | None = None):
+        """Sample every symbol once; ``scheduled`` is the tick time (epoch s)."""
+        if scheduled is None:
+            scheduled = self.clock()
+        ts = datetime.fromtimestamp(scheduled, tz=timezone.utc)
+        await asyncio.gather(*(self.process_symbol(sym, ts) for sym in self.symbols))
+
+    async def process_symbol(self, sym: str, ts: datetime):
+        mark_price, index_price = await asyncio.gather(
+            asyncio.to_thread(self.exchange.get_mark_price, sym, self.net),
+            asyncio.to_thread(self.exchange.get_index_price, sym, self.net),
+        )
+        # the prices close the minute before the tick; stamp the bar with
+        # that minute's start, as warm_start and the backtests do
+        ts_ms = int(ts.timestamp() * 1000) // 60_000 * 60_000 - 60_000
+        bar = {"close": mark_price, "index_close": index_price}
+        for name, strat in self.strategies[sym]:
+            signal = strat.on_bar(ts_ms, bar)
+            if signal == 0:
+                continue
+            side = "Buy" if signal > 0 else "Sell"
+            qty = getattr(strat, "risk_mult", 1.0)
+            await self.executor.submit(Order(sym, side, qty, mark_price, name, ts))
+
+    async def on_order_ack(self, order: Order):
+        if order.error is not None:
+            print(f"[WARN] {order.side} {order.symbol} order failed: {order.error}")
+            return
+        funding = await asyncio.to_thread(
+            self.exchange.fetch_funding, order.symbol, self.net
+        )
+        self.journal.write(
+            order.ts,
+            order.symbol,
+            order.strategy,
+            order.side,
+            order.qty,
+            order.price,
+            order.fee,
+            funding,
+            order.realised_pnl,
+        )
 
     def stop(self):
         self.running = False
-        self.log.close()
+        self.journal.close()
 
 
 def parse_args():
@@ -126,13 +212,49 @@ def parse_args():
         "--symbols", default="BTCUSDT,ETHUSDT", help="Comma separated symbols"
     )
     parser.add_argument("--risk-mult", type=float, default=1.0)
+    parser.add_argument(
+        "--warmup-bars",
+        type=int,
+        default=480,
+        help="Minutes of history replayed into the strategies at startup",
+    )
+    parser.add_argument(
+        "--time-weighted-funding",
+        action="store_true",
+        help="Predict funding from the time-weighted premium of each 8h window",
+    )
+    parser.add_argument(
+        "--order-workers", type=int, default=4, help="Concurrent order senders"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Orders per create-batch request (1 sends orders individually)",
+    )
+    parser.add_argument(
+        "--tick-offset",
+        type=float,
+        default=2.0,
+        help="Seconds after each minute boundary to sample prices",
+    )
     return parser.parse_args()
 
 
 async def main():
     args = parse_args()
     symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
-    bot = LiveBot(args.net, symbols, args.risk_mult)
+    bot = LiveBot(
+        args.net,
+        symbols,
+        args.risk_mult,
+        order_workers=args.order_workers,
+        batch_size=args.batch_size,
+        tick_offset=args.tick_offset,
+        time_weighted_funding=args.time_weighted_funding,
+    )
+    if args.warmup_bars > 0:
+        await asyncio.to_thread(bot.warm_start, args.warmup_bars)
     try:
         await bot.run()
     except KeyboardInterrupt:
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import tempfile
+from functools import lru_cache
+from importlib import import_module
+import multiprocessing
+from multiprocessing import cpu_count
+
+import numpy as np
+import pandas as pd
+
+from backtests.run_backtest import load_data
+from backtests.core import cagr, max_drawdown, payoff_ratio, sharpe_ratio, win_rate
+from backtests.signal_cache import default_cache
+from utils.db import pooled_conn
+
+# strategies whose signals need the index price joined to the bars
+NEEDS_INDEX = {"funding_carry"}
+
+
+def load_jobs(path: str) -> list[dict]:
+    """Read a JSON or YAML job file.
+
+    The file holds a ``jobs`` list and optional ``defaults`` merged into
+    every job. A job names a ``strategy``, its ``params``, a ``symbol`` (or a
+    ``symbols`` list, expanded to one job each) and a ``start``/``end``
+    window.
+    """
+    with open(path) as fh:
+        if path.endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("YAML job files need PyYAML: pip install pyyaml") from None
+            spec = yaml.safe_load(fh)
+        else:
+            spec = json.load(fh)
+    defaults = spec.get("defaults", {})
+    jobs = []
+    for entry in spec["jobs"]:
+        job = {**defaults, **entry}
+        symbols = job.pop("symbols", None) or [job["symbol"]]
+        for sym in symbols:
+            jobs.append({
+                "id": len(jobs),
+                "strategy": job["strategy"],
+                "params": job.get("params", {}),
+                "symbol": sym,
+                "start": str(job["start"]),
+                "end": str(job["end"]),
+            })
+    return jobs
+
+
+def plan(jobs: list[dict]) -> list[dict]:
+    """Group jobs so each symbol's overlapping windows are loaded once.
+
+    Returns load groups with the ``symbol``, the covering ``start``/``end``,
+    whether the index price is needed and the ``jobs`` sliced from it.
+    """
+    groups = []
+    by_symbol: dict[str, list[dict]] = {}
+    for job in jobs:
+        by_symbol.setdefault(job["symbol"], []).append(job)
+    for symbol, sym_jobs in by_symbol.items():
+        sym_jobs.sort(key=lambda j: pd.Timestamp(j["start"]))
+        current = None
+        for job in sym_jobs:
+            start, end = pd.Timestamp(job["start"]), pd.Timestamp(job["end"])
+            if current is None or start > current["end"]:
+                current = {"symbol": symbol, "start": start, "end": end,
+                           "with_index": False, "jobs": []}
+                groups.append(current)
+            current["end"] = max(current["end"], end)
+            current["with_index"] |= job["strategy"] in NEEDS_INDEX
+            current["jobs"].append(job)
+    return groups
+
+
+@lru_cache(maxsize=None)
+def strategy_class(name: str):
+    module = import_module(f"strategies.{name}")
+    return getattr(module, "".join(p.capitalize() for p in name.split("_")))
+
+
+def job_row(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "strategy": job["strategy"],
+        "symbol": job["symbol"],
+        "start": job["start"],
+        "end": job["end"],
+        "params": json.dumps(job["params"], sort_keys=True),
+    }
+
+
+def run_job(job: dict, df: pd.DataFrame, cache=None) -> dict:
+    row = job_row(job)
+    try:
+        strat = strategy_class(job["strategy"])(**job["params"])
+        signals = cache.signals(strat, job["symbol"], df) if cache else None
+        trades, equity = strat.simulate(df, signals)
+    except Exception as exc:
+        row["error"] = repr(exc)
+        return row
+    row.update({
+        "bars": len(df),
+        "trades": len(trades),
+        "cagr": cagr(equity),
+        "maxdd": max_drawdown(equity),
+        "sharpe": sharpe_ratio(equity),
+        "win_rate": win_rate(trades),
+        "payoff": payoff_ratio(trades),
+        "error": None,
+    })
+    return row
+
+
+def store_frame(df: pd.DataFrame, path: str) -> None:
+    """Write ``df`` as one ``.npy`` file per column for :func:`open_slice`."""
+    os.makedirs(path)
+    np.save(os.path.join(path, "ts.npy"), pd.DatetimeIndex(df.index).as_unit("ms").asi8)
+    for c in df.columns:
+        np.save(os.path.join(path, f"{c}.npy"), df[c].to_numpy())
+    with open(os.path.join(path, "columns.json"), "w") as fh:
+        json.dump(list(df.columns), fh)
+
+
+def open_slice(path: str, start, end) -> pd.DataFrame:
+    """Rows ``start..end`` (inclusive) of a frame written by :func:`store_frame`.
+
+    Columns are memory-mapped, so each process reads only its own slice.
+    """
+    with open(os.path.join(path, "columns.json")) as fh:
+        columns = json.load(fh)
+    ts = np.load(os.path.join(path, "ts.npy"), mmap_mode="r")
+    lo = int(np.searchsorted(ts, pd.Timestamp(start).value // 1_000_000, side="left"))
+    hi = int(np.searchsorted(ts, pd.Timestamp(end).value // 1_000_000, side="right"))
+    index = pd.Index(pd.to_datetime(np.array(ts[lo:hi]), unit="ms"), name="ts")
+    # copies: generate_signals adds columns to the frame it is given
+    data = {c: np.array(np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r")[lo:hi])
+            for c in columns}
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def load_group(task) -> tuple:
+    """Load one group's bars into ``directory``.
+
+    Returns ``(group, path, error)``; a failed load gives no path and the
+    error text, so only that group's jobs are lost.
+    """
+    group, directory = task
+    path = os.path.join(directory, f"{group['symbol']}-{group['jobs'][0]['id']}")
+    try:
+        with pooled_conn() as conn:
+            data = load_data(
+                conn, group["symbol"], str(group["start"]), str(group["end"]),
+                with_index=group["with_index"],
+            )
+        store_frame(data, path)
+    except Exception as exc:
+        return group, None, repr(exc)
+    return group, path, None
+
+
+def run_stored_job(task) -> dict:
+    job, path = task
+    return run_job(job, open_slice(path, job["start"], job["end"]), default_cache())
+
+
+def run_batch(jobs: list[dict], workers: int, context: str = None) -> pd.DataFrame:
+    """Load each group once, then run every job as its own pool task.
+
+    Jobs of a group start as soon as its bars are stored, while other
+    groups are still loading, and read their slice from the memory-mapped
+    copy instead of receiving it through the pool. ``context`` picks the
+    multiprocessing start method (the platform default if ``None``).
+    """
+    groups = plan(jobs)
+    # biggest loads first so one long group does not finish last
+    groups.sort(key=lambda g: (g["end"] - g["start"]) * len(g["jobs"]), reverse=True)
+    ctx = multiprocessing.get_context(context)
+    with tempfile.TemporaryDirectory(prefix="batch-") as directory, ctx.Pool(workers) as pool:
+        rows, pending = [], []
+        for group, path, error in pool.imap_unordered(load_group, [(g, directory) for g in groups]):
+            if error is not None:
+                rows += [{**job_row(job), "error": f"load failed: {error}"} for job in group["jobs"]]
+                continue
+            pending += [pool.apply_async(run_stored_job, ((job, path),)) for job in group["jobs"]]
+        rows += [r.get() for r in pending]
+    return pd.DataFrame(rows).sort_values("id").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of backtests from a job file")
+    parser.add_argument("jobs", help="JSON or YAML job file")
+    parser.add_argument("--out", default="batch_results.csv")
+    parser.add_argument("--workers", type=int, default=max(1, cpu_count() - 1))
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.jobs)
+    print(f"{len(jobs)} jobs in {len(plan(jobs))} data loads")
+    results = run_batch(jobs, args.workers)
+    results.to_csv(args.out, index=False)
+    failed = results["error"].notna().sum()
+    print(f"Saved {args.out} with {len(results)} rows ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,30 @@
 import argparse
+import hashlib
 import itertools
-from multiprocessing import Pool, cpu_count
+import json
+import time
+from multiprocessing import Pool, Process, cpu_count
 
 import pandas as pd
 
 from backtests.run_backtest import load_data
 from strategies.vol_breakout import VolBreakout
 from backtests.core import cagr, max_drawdown, sharpe_ratio
-from utils.db import db_conn
+from utils.db import pooled_conn
+from utils.workqueue import WorkQueue, run_worker
 
 
 def run_combo(args):
     symbol, lookback, range_pct, breakout_pct, start, end = args
-    conn = db_conn()
-    try:
+    # the pool is per process, so each worker reuses its connection
+    with pooled_conn() as conn:
         df = load_data(conn, symbol, start, end)
-    finally:
-        conn.close()
     strat = VolBreakout(
         lookback=lookback,
         range_threshold=range_pct / 100,
         breakout_threshold=breakout_pct / 100,
     )
+    # every combo has its own parameters, so a signal cache would only miss
     trades, equity = strat.simulate(df)
     return {
         "symbol": symbol,
@@ -35,13 +38,75 @@ def run_combo(args):
     }
 
 
+def run_queued(path: str, combos: list, local_workers: int, lease: float) -> list:
+    """Queue combos in a SQLite work queue and wait for workers to finish them.
+
+    ``local_workers`` worker processes are started here; more can join from
+    other hosts with ``run_grid.py --worker --queue PATH``. An existing
+    queue file is resumed only if it was created for the same combos.
+    """
+    payloads = [list(c) for c in combos]
+    tag = hashlib.sha256(json.dumps(payloads).encode()).hexdigest()
+    queue = WorkQueue(path, lease)
+    try:
+        if not queue.seed(payloads, tag):
+            print(f"Resuming {path}: {queue.counts()}")
+    except ValueError as exc:
+        queue.close()
+        raise SystemExit(f"{exc}; remove it or pass another --queue file") from None
+    procs = [
+        Process(target=run_worker, args=(path, _run_payload, lease))
+        for _ in range(local_workers)
+    ]
+    for p in procs:
+        p.start()
+    while queue.unfinished():
+        time.sleep(5)
+    for p in procs:
+        p.join()
+    counts = queue.counts()
+    if counts.get("failed"):
+        print(f"{counts['failed']} combinations failed")
+    results = queue.results()
+    queue.close()
+    return results
+
+
+def _run_payload(payload):
+    return run_combo(tuple(payload))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Grid search vol_breakout")
-    parser.add_argument("--start", required=True)
-    parser.add_argument("--end", required=True)
-    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--symbols", nargs="+")
+    parser.add_argument(
+        "--queue", help="SQLite work queue file for distributed runs"
+    )
+    parser.add_argument(
+        "--worker", action="store_true", help="Only process jobs from --queue"
+    )
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=max(1, cpu_count() - 1),
+        help="Worker processes the coordinator starts itself",
+    )
+    parser.add_argument(
+        "--lease", type=float, default=300.0, help="Job lease length in seconds"
+    )
     args = parser.parse_args()
 
+    if args.worker:
+        if not args.queue:
+            parser.error("--worker requires --queue")
+        done = run_worker(args.queue, _run_payload, args.lease)
+        print(f"Worker finished {done} combinations")
+        return
+    if not (args.start and args.end and args.symbols):
+        parser.error("--start, --end and --symbols are required")
+
     lookbacks = [15, 30, 45, 60]
     range_thrs = [0.10, 0.15, 0.20, 0.25]
     breakout_thrs = [0.05, 0.10, 0.15]
@@ -51,9 +116,12 @@ def main():
     )
     combos = [(s, l, r, b, args.start, args.end) for s, l, r, b in combos]
 
-    workers = max(1, cpu_count() - 1)
-    with Pool(workers) as pool:
-        results = list(pool.imap_unordered(run_combo, combos))
+    if args.queue:
+        results = run_queued(args.queue, combos, args.local_workers, args.lease)
+    else:
+        workers = max(1, cpu_count() - 1)
+        with Pool(workers) as pool:
+            results = list(pool.imap_unordered(run_combo, combos))
 
     df = pd.DataFrame(results)
     df.to_csv("grid_results.csv", index=False)
@@ -1,13 +1,23 @@
 import os
 import time
+import struct
+import hashlib
 import argparse
 import logging
+import math
+from datetime import datetime, timezone
+from functools import lru_cache
+import numpy as np
 import requests
 from tqdm import tqdm
-from utils.db import db_conn
+from utils import packed
+from utils.db import pooled_conn
 
 BASE_URL = "https://api.bybit.com"
 
+# minute tables that BAR_LAYOUT=packed stores in {table}_packed instead
+PACKED_TABLES = ("mark1", "index1")
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 def create_tables(conn):
@@ -58,6 +68,27 @@ def create_tables(conn):
                 symbol VARCHAR(20) PRIMARY KEY
             )"""
         )
+        cur.execute(
+            """CREATE TABLE IF NOT EXISTS checksums (
+                symbol VARCHAR(20) NOT NULL,
+                tbl VARCHAR(20) NOT NULL,
+                day BIGINT NOT NULL,
+                row_count INT NOT NULL,
+                checksum CHAR(16) NOT NULL,
+                verifiedAt BIGINT NOT NULL,
+                PRIMARY KEY(symbol, tbl, day)
+            )"""
+        )
+        for table in PACKED_TABLES:
+            # BAR_LAYOUT=packed: one row per symbol-hour, see utils/packed.py
+            cur.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table}_packed (
+                    symbol VARCHAR(20) NOT NULL,
+                    hourStart BIGINT NOT NULL,
+                    bars BLOB NOT NULL,
+                    PRIMARY KEY(symbol, hourStart)
+                )"""
+            )
         # ensure new column exists
         cur.execute("SHOW COLUMNS FROM funding8h LIKE 'fundingRateTimestamp'")
         if not cur.fetchone():
@@ -66,7 +97,7 @@ def create_tables(conn):
             )
     conn.commit()
 
-def fetch_with_paging(endpoint, params, list_key="list", start=None, end=None):
+def fetch_with_paging(endpoint, params, list_key="list", start=None, end=None, raise_errors=False):
     """Yield rows from Bybit API going backwards in time.
 
     Parameters
@@ -83,6 +114,9 @@ def fetch_with_paging(endpoint, params, list_key="list", start=None, end=None):
         means fetch as far back as the API allows.
     end : int, optional
         End timestamp in milliseconds. Defaults to ``now``.
+    raise_errors : bool, optional
+        Re-raise request failures instead of logging them and stopping, so
+        callers can tell a failed fetch from the end of the data.
     """
 
     end_ts = end or int(time.time() * 1000)
@@ -95,6 +129,8 @@ def fetch_with_paging(endpoint, params, list_key="list", start=None, end=None):
             resp = requests.get(BASE_URL + endpoint, params=params, timeout=10)
             resp.raise_for_status()
         except Exception as exc:
+            if raise_errors:
+                raise
             logging.error("Request failed: %s", exc)
             break
         data = resp.json().get("result", {}).get(list_key) or []
@@ -119,9 +155,34 @@ def fetch_with_paging(endpoint, params, list_key="list", start=None, end=None):
         end_ts = last_ts - 1
         time.sleep(0.05)
 
+@lru_cache(maxsize=None)
+def fetch_tick_decimals(symbol):
+    """Decimal places of the symbol's price tick, 0 when it cannot be fetched.
+
+    Only a starting point for :func:`packed.encode_hour`, which widens the
+    scale when a price needs more digits.
+    """
+    try:
+        resp = requests.get(
+            BASE_URL + "/v5/market/instruments-info",
+            params={"category": "linear", "symbol": symbol},
+            timeout=10,
+        )
+        resp.raise_for_status()
+        info = resp.json()["result"]["list"][0]
+        return packed.tick_decimals(info["priceFilter"]["tickSize"])
+    except Exception as exc:
+        logging.warning("No tick size for %s: %s", symbol, exc)
+        return 0
+
 def insert_mark(conn, symbol, rows, table):
     if not rows:
         return
+    if packed.enabled():
+        ts = np.array([int(r[0]) for r in rows], dtype=np.int64)
+        ohlc = np.array([[float(v) for v in r[1:5]] for r in rows], dtype=np.float64)
+        packed.write_packed(conn, table, symbol, ts, ohlc, fetch_tick_decimals(symbol))
+        return
     with conn.cursor() as cur:
         sql = f"""
         INSERT INTO {table} (symbol, startTime, open, high, low, close)
@@ -168,10 +229,27 @@ def insert_funding(conn, symbol, rows):
             cur.executemany(anomaly_sql, anomalies)
     conn.commit()
 
-def check_gaps(conn, table, symbol):
+def latest_start(conn, table, symbol):
+    """Newest stored ``startTime`` of ``symbol`` in ``table``, or None."""
     with conn.cursor() as cur:
-        cur.execute(f"SELECT startTime FROM {table} WHERE symbol=%s ORDER BY startTime", (symbol,))
-        times = [r[0] for r in cur.fetchall()]
+        if table in PACKED_TABLES and packed.enabled():
+            cur.execute(
+                f"SELECT hourStart, bars FROM {table}_packed WHERE symbol=%s "
+                "ORDER BY hourStart DESC LIMIT 1",
+                (symbol,),
+            )
+            row = cur.fetchone()
+            return None if row is None else int(packed.decode_hour(int(row[0]), bytes(row[1]))[0][-1])
+        cur.execute(f"SELECT MAX(startTime) FROM {table} WHERE symbol=%s", (symbol,))
+        return cur.fetchone()[0]
+
+def check_gaps(conn, table, symbol):
+    if table in PACKED_TABLES and packed.enabled():
+        times = packed.load_packed(conn, table, symbol, 0, 2 ** 62)[0].tolist()
+    else:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT startTime FROM {table} WHERE symbol=%s ORDER BY startTime", (symbol,))
+            times = [r[0] for r in cur.fetchall()]
     for prev, curr in zip(times, times[1:]):
         if curr - prev > 60_000:
             logging.warning("Gap >1m in %s for %s: %s -> %s", table, symbol, prev, curr)
@@ -181,9 +259,7 @@ def ingest_symbol(conn, symbol, full=False):
     logging.info("Ingesting %s", symbol)
     now = int(time.time() * 1000)
 
-    with conn.cursor() as cur:
-        cur.execute("SELECT MAX(startTime) FROM mark1 WHERE symbol=%s", (symbol,))
-        max_mark = cur.fetchone()[0]
+    max_mark = latest_start(conn, "mark1", symbol)
     mark_start = None if full or max_mark is None else int(max_mark) + 1
 
     mark_rows = []
@@ -206,9 +282,7 @@ def ingest_symbol(conn, symbol, full=False):
         insert_mark(conn, symbol, mark_rows, "mark1")
     check_gaps(conn, "mark1", symbol)
 
-    with conn.cursor() as cur:
-        cur.execute("SELECT MAX(startTime) FROM index1 WHERE symbol=%s", (symbol,))
-        max_idx = cur.fetchone()[0]
+    max_idx = latest_start(conn, "index1", symbol)
     index_start = None if full or max_idx is None else int(max_idx) + 1
 
     index_rows = []
@@ -231,9 +305,7 @@ def ingest_symbol(conn, symbol, full=False):
         insert_mark(conn, symbol, index_rows, "index1")
     check_gaps(conn, "index1", symbol)
 
-    with conn.cursor() as cur:
-        cur.execute("SELECT MAX(startTime) FROM funding8h WHERE symbol=%s", (symbol,))
-        max_funding = cur.fetchone()[0]
+    max_funding = latest_start(conn, "funding8h", symbol)
     funding_start = None if full or max_funding is None else int(max_funding) + 1
 
     funding_rows = []
@@ -255,30 +327,262 @@ def ingest_symbol(conn, symbol, full=False):
         insert_funding(conn, symbol, funding_rows)
     check_gaps(conn, "funding8h", symbol)
 
+DAY_MS = 86_400_000
+
+# API source, query parameters and stored columns of each verifiable table
+SOURCES = {
+    "mark1": ("/v5/market/mark-price-kline", {"interval": 1, "limit": 1000},
+              "open, high, low, close"),
+    "index1": ("/v5/market/index-price-kline", {"interval": 1, "limit": 1000},
+               "open, high, low, close"),
+    "funding8h": ("/v5/market/funding/history", {"limit": 200}, "fundingRate"),
+}
+
+
+def normalize_row(table, row):
+    """API row as ``(startTime, value, ...)``, the form stored rows are read in."""
+    if table == "funding8h":
+        return (int(row["fundingRateTimestamp"]), float(row["fundingRate"]))
+    return (int(row[0]),) + tuple(float(v) for v in row[1:5])
+
+
+def day_checksums(rows):
+    """Map each UTC day (epoch ms) to ``(row count, checksum)`` of its rows.
+
+    Rows are ``(startTime, value, ...)`` tuples in any order; values are
+    hashed as float64 so database and API rows compare exactly.
+    """
+    days = {}
+    for row in sorted(rows):
+        days.setdefault(row[0] // DAY_MS * DAY_MS, []).append(row)
+    out = {}
+    for day, day_rows in days.items():
+        h = hashlib.blake2b(digest_size=8)
+        for r in day_rows:
+            h.update(struct.pack(f"<q{len(r) - 1}d", *r))
+        out[day] = (len(day_rows), h.hexdigest())
+    return out
+
+
+def stored_rows(conn, table, symbol, start, end):
+    if table in PACKED_TABLES and packed.enabled():
+        ts, ohlc = packed.load_packed(conn, table, symbol, start, end)
+        return [(t,) + tuple(v) for t, v in zip(ts.tolist(), ohlc.tolist())]
+    cols = SOURCES[table][2]
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT startTime, {cols} FROM {table} "
+            "WHERE symbol=%s AND startTime BETWEEN %s AND %s",
+            (symbol, start, end),
+        )
+        return [(int(r[0]),) + tuple(float(v) for v in r[1:]) for r in cur.fetchall()]
+
+
+def load_verified(conn, table, symbol, start, end):
+    """Checksums recorded by earlier verifications, by day."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT day, row_count, checksum, verifiedAt FROM checksums "
+            "WHERE symbol=%s AND tbl=%s AND day BETWEEN %s AND %s",
+            (symbol, table, start, end),
+        )
+        return {int(r[0]): ((int(r[1]), r[2]), int(r[3])) for r in cur.fetchall()}
+
+
+def save_verified(conn, table, symbol, sums, now):
+    if not sums:
+        return
+    with conn.cursor() as cur:
+        cur.executemany(
+            """
+            INSERT INTO checksums (symbol, tbl, day, row_count, checksum, verifiedAt)
+            VALUES (%s,%s,%s,%s,%s,%s)
+            ON DUPLICATE KEY UPDATE row_count=VALUES(row_count),
+                checksum=VALUES(checksum), verifiedAt=VALUES(verifiedAt)
+            """,
+            [(symbol, table, day, n, digest, now) for day, (n, digest) in sums.items()],
+        )
+    conn.commit()
+
+
+def replace_day(conn, table, symbol, day, rows):
+    """Swap the stored rows of one day for freshly fetched API rows."""
+    with conn.cursor() as cur:
+        if table in PACKED_TABLES and packed.enabled():
+            cur.execute(
+                f"DELETE FROM {table}_packed WHERE symbol=%s AND hourStart BETWEEN %s AND %s",
+                (symbol, day, day + DAY_MS - 1),
+            )
+        else:
+            cur.execute(
+                f"DELETE FROM {table} WHERE symbol=%s AND startTime BETWEEN %s AND %s",
+                (symbol, day, day + DAY_MS - 1),
+            )
+    # both insert helpers commit, so the delete and insert land together
+    if table == "funding8h":
+        insert_funding(conn, symbol, rows)
+    else:
+        insert_mark(conn, symbol, rows, table)
+
+
+def fetch_days(table, symbol, first_day, last_day):
+    """Fetch API rows for whole days ``first_day..last_day``, grouped by day."""
+    endpoint, params, _ = SOURCES[table]
+    days = {}
+    for row in fetch_with_paging(
+        endpoint,
+        {"category": "linear", "symbol": symbol, **params},
+        start=first_day,
+        end=last_day + DAY_MS - 1,
+        raise_errors=True,
+    ):
+        ts = normalize_row(table, row)[0]
+        if first_day <= ts < last_day + DAY_MS:
+            days.setdefault(ts // DAY_MS * DAY_MS, []).append(row)
+    return days
+
+
+def verify_table(conn, table, symbol, start_day, end_day, recheck_days=30, now=None,
+                 cycle_days=90):
+    """Compare stored days of ``table`` with the API and re-ingest mismatches.
+
+    The API is queried for days never verified, days whose stored rows no
+    longer match the recorded checksum, and the last ``recheck_days`` days
+    (where the exchange may still correct candles). Older verified days
+    are rechecked on a rolling basis so late corrections are caught too:
+    each run takes the ``1/cycle_days`` share verified longest ago, plus
+    any not verified within ``cycle_days``. ``cycle_days=0`` disables this.
+    Returns ``(days fetched, days repaired)``.
+    """
+    now = now or int(time.time() * 1000)
+    last = end_day - DAY_MS
+    db = day_checksums(stored_rows(conn, table, symbol, start_day, end_day - 1))
+    recorded = load_verified(conn, table, symbol, start_day, last)
+    recent = now // DAY_MS * DAY_MS - recheck_days * DAY_MS
+    todo = set()
+    settled = []
+    for day in range(start_day, end_day, DAY_MS):
+        if day not in recorded or recorded[day][0] != db.get(day) or day >= recent:
+            todo.add(day)
+        else:
+            settled.append(day)
+    if cycle_days and settled:
+        settled.sort(key=lambda d: (recorded[d][1], d))
+        todo.update(settled[:math.ceil(len(settled) / cycle_days)])
+        stale = now - cycle_days * DAY_MS
+        todo.update(d for d in settled if recorded[d][1] <= stale)
+    todo = sorted(todo)
+
+    # fetch contiguous runs of days together to save requests
+    runs = []
+    for day in todo:
+        if runs and runs[-1][1] + DAY_MS == day:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    fetched = repaired = 0
+    for first, last_run in runs:
+        try:
+            api_days = fetch_days(table, symbol, first, last_run)
+        except Exception as exc:
+            logging.error("Verify %s %s: fetch failed, skipping run: %s", table, symbol, exc)
+            continue
+        verified = {}
+        for day in range(first, last_run + DAY_MS, DAY_MS):
+            rows = api_days.get(day)
+            if not rows:
+                # history the API no longer serves; keep what is stored
+                continue
+            fetched += 1
+            api_sum = day_checksums(normalize_row(table, r) for r in rows)[day]
+            if api_sum != db.get(day):
+                logging.warning(
+                    "Verify %s %s: day %s differs (stored %s, api %s), re-ingesting",
+                    table, symbol, day, db.get(day), api_sum,
+                )
+                replace_day(conn, table, symbol, day, rows)
+                repaired += 1
+            verified[day] = api_sum
+        save_verified(conn, table, symbol, verified, now)
+    logging.info(
+        "Verified %s %s: %d days, %d fetched, %d re-ingested",
+        table, symbol, (end_day - start_day) // DAY_MS, fetched, repaired,
+    )
+    return fetched, repaired
+
+
+def verify_symbol(conn, symbol, start, end=None, tables=tuple(SOURCES), recheck_days=30,
+                  cycle_days=90):
+    """Verify whole UTC days from ``start`` up to (not including) ``end``.
+
+    Dates are ``YYYY-MM-DD``; ``end`` defaults to today, leaving out the
+    day still being written.
+    """
+    start_day = _day_ms(start)
+    end_day = _day_ms(end) if end else int(time.time() * 1000) // DAY_MS * DAY_MS
+    return {
+        table: verify_table(conn, table, symbol, start_day, end_day, recheck_days,
+                            cycle_days=cycle_days)
+        for table in tables
+    }
+
+
+def _day_ms(date):
+    day = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(day.timestamp()) * 1000
+
+
 def main():
     parser = argparse.ArgumentParser(description="Backfill Bybit data")
     parser.add_argument("--symbols", nargs="*", help="Symbols to ingest")
     parser.add_argument("--full", action="store_true", help="Force full backfill")
+    parser.add_argument(
+        "--verify",
+        metavar="START",
+        help="Instead of ingesting, verify stored days from START (YYYY-MM-DD) against the API",
+    )
+    parser.add_argument("--verify-end", help="End date of --verify (default today)")
+    parser.add_argument(
+        "--recheck-days",
+        type=int,
+        default=30,
+        help="Recent days re-fetched even when already verified",
+    )
+    parser.add_argument(
+        "--recheck-cycle",
+        type=int,
+        default=90,
+        help="Older verified days are all re-fetched over this many runs/days (0: never)",
+    )
     args = parser.parse_args()
-    conn = db_conn()
-    # ensure tables exist and upgrade schema if necessary
-    with conn.cursor() as cur:
-        cur.execute("SHOW TABLES LIKE 'funding8h'")
-        if not cur.fetchone():
-            create_tables(conn)
-        else:
-            cur.execute("SHOW COLUMNS FROM funding8h LIKE 'fundingRateTimestamp'")
+    with pooled_conn() as conn:
+        # ensure tables exist and upgrade schema if necessary
+        with conn.cursor() as cur:
+            cur.execute("SHOW TABLES LIKE 'funding8h'")
             if not cur.fetchone():
                 create_tables(conn)
-    if args.symbols:
-        symbols = args.symbols
-    else:
-        with conn.cursor() as cur:
-            cur.execute("SELECT symbol FROM symbols")
-            symbols = [r[0] for r in cur.fetchall()]
-    for sym in symbols:
-        ingest_symbol(conn, sym, full=args.full)
-    conn.close()
+            else:
+                cur.execute("SHOW COLUMNS FROM funding8h LIKE 'fundingRateTimestamp'")
+                if not cur.fetchone():
+                    create_tables(conn)
+        if args.symbols:
+            symbols = args.symbols
+        else:
+            with conn.cursor() as cur:
+                cur.execute("SELECT symbol FROM symbols")
+                symbols = [r[0] for r in cur.fetchall()]
+        if args.verify or packed.enabled():
+            # idempotent; adds the checksum and packed tables to older schemas
+            create_tables(conn)
+        if args.verify:
+            for sym in symbols:
+                verify_symbol(
+                    conn, sym, args.verify, args.verify_end,
+                    recheck_days=args.recheck_days, cycle_days=args.recheck_cycle,
+                )
+            return
+        for sym in symbols:
+            ingest_symbol(conn, sym, full=args.full)
 
 if __name__ == "__main__":
     main()
@@ -3,9 +3,13 @@ from importlib import import_module
 
 import pandas as pd
 
-from backtests.run_backtest import load_data
-from backtests.core import run_portfolio, cagr, max_drawdown, sharpe_ratio
-from utils.db import db_conn
+from backtests.run_backtest import iter_bars, load_data
+from backtests.core import PortfolioSimulator, cagr, max_drawdown, sharpe_ratio
+from backtests.engine import EventEngine
+from backtests.panel import Panel
+from backtests.robustness import robustness_report
+from backtests.signal_cache import default_cache
+from utils.db import pooled_conn
 
 
 def main():
@@ -14,21 +18,56 @@ def main():
     parser.add_argument("--strategies", nargs="+", required=True)
     parser.add_argument("--start", required=True)
     parser.add_argument("--end", required=True)
+    parser.add_argument(
+        "--mc-paths",
+        type=int,
+        default=0,
+        help="Monte Carlo paths for robustness intervals (0 disables)",
+    )
+    parser.add_argument(
+        "--engine",
+        action="store_true",
+        help="Event-driven run with one shared account instead of per-strategy equity",
+    )
+    parser.add_argument(
+        "--allocation",
+        type=float,
+        default=0.1,
+        help="Fraction of equity committed per position (--engine)",
+    )
+    parser.add_argument("--leverage", type=float, default=1.0, help="Leverage (--engine)")
+    parser.add_argument(
+        "--max-positions", type=int, help="Concurrent position cap (--engine)"
+    )
+    parser.add_argument(
+        "--max-per-symbol", type=int, help="Concurrent positions per symbol (--engine)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate signals instead of using the signal cache",
+    )
     args = parser.parse_args()
 
-    conn = db_conn()
-    data = {sym: load_data(conn, sym, args.start, args.end, with_index=True) for sym in args.symbols}
-    conn.close()
+    if args.engine:
+        run_engine(args)
+        return
+
+    with pooled_conn() as conn:
+        data = {sym: load_data(conn, sym, args.start, args.end, with_index=True) for sym in args.symbols}
+
+    panel = Panel.from_frames(data)
 
     strategy_items = []
     for strat_name in args.strategies:
         module = import_module(f"strategies.{strat_name}")
         cls = getattr(module, "".join([p.capitalize() for p in strat_name.split("_")]))
-        for sym in args.symbols:
-            strat = cls()
-            strategy_items.append((strat_name, sym, strat, data[sym]))
+        strategy_items.append((strat_name, cls()))
 
-    summary, portfolio_eq, _ = run_portfolio(strategy_items)
+    cache = None if args.no_cache else default_cache()
+    summary, portfolio_eq, trades = PortfolioSimulator.from_panel(
+        strategy_items, panel, cache=cache
+    ).run()
 
     for strat in summary["strategy"].unique():
         sub = summary[summary["strategy"] == strat]
@@ -40,6 +79,51 @@ def main():
     print(f"CAGR: {cagr(portfolio_eq):.2%}")
     print(f"MaxDD: {max_drawdown(portfolio_eq):.2%}")
     print(f"Sharpe: {sharpe_ratio(portfolio_eq):.2f}")
+    if args.mc_paths > 0:
+        print()
+        print(f"Robustness ({args.mc_paths} paths):")
+        print(robustness_report(trades, portfolio_eq, n_paths=args.mc_paths).to_string())
+
+
+def run_engine(args):
+    strategies = []
+    for strat_name in args.strategies:
+        module = import_module(f"strategies.{strat_name}")
+        strategies.append(
+            (strat_name, getattr(module, "".join([p.capitalize() for p in strat_name.split("_")])))
+        )
+    engine = EventEngine(
+        strategies,
+        allocation=args.allocation,
+        leverage=args.leverage,
+        max_positions=args.max_positions,
+        max_per_symbol=args.max_per_symbol,
+    )
+    # bars are streamed from the database a chunk at a time
+    with pooled_conn() as conn:
+        streams = {
+            sym: iter_bars(conn, sym, args.start, args.end, with_index=True)
+            for sym in args.symbols
+        }
+        trades, equity = engine.run(streams)
+
+    if len(trades):
+        summary = trades.groupby(["strategy", "symbol"]).agg(
+            trades=("pnl_value", "size"), pnl=("pnl_value", "sum")
+        )
+        print(summary.to_string())
+        print()
+    if engine.rejected:
+        print("Rejected entries: " + ", ".join(f"{k}={v}" for k, v in engine.rejected.items()))
+    print("Portfolio Metrics:")
+    print(f"CAGR: {cagr(equity):.2%}")
+    print(f"MaxDD: {max_drawdown(equity):.2%}")
+    print(f"Sharpe: {sharpe_ratio(equity):.2f}")
+    if args.mc_paths > 0:
+        print()
+        print(f"Robustness ({args.mc_paths} paths):")
+        # trades carry their weight, so paths compound only the allocated equity
+        print(robustness_report(trades, equity, n_paths=args.mc_paths).to_string())
 
 
 if __name__ == "__main__":
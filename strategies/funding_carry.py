@@ -1,20 +1,91 @@
+import numpy as np
 import pandas as pd
+from backtests.barframe import BarFrame
 from backtests.core import Strategy
-from utils.funding import minutes_to_settlement, predicted_funding
+from utils.funding import (
+    SLOTS,
+    FundingEstimator,
+    minutes_to_settlement,
+    minutes_to_settlement_array,
+    predicted_funding_twap,
+)
+
+
+def _instant(mark, index):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip((mark - index) / index, -0.0075, 0.0075)
+
+
+def _carry(pred, minutes):
+    """Array version of the carry rule; ``minutes`` aligns with the last axis."""
+    signal = np.zeros(pred.shape, dtype=np.int8)
+    signal[(pred > 0.003) & (minutes >= 5)] = -1
+    signal[(pred < -0.003) & (minutes >= 5)] = 1
+    signal[..., minutes <= 3] = 0
+    return signal
 
 
 class FundingCarry(Strategy):
     """Carry strategy based on predicted funding."""
 
+    CACHE_MODULES = ("utils.funding",)
+
+    def __init__(self, time_weighted: bool = False):
+        """Initialize the funding estimate.
+
+        Parameters
+        ----------
+        time_weighted : bool
+            Predict funding from the time-weighted premium of the current
+            settlement window, as the exchange settles it. The default
+            ``False`` uses the clipped premium of each bar on its own.
+        """
+        self.time_weighted = time_weighted
+        self.reset()
+
+    @property
+    def warmup_bars(self) -> int:
+        # the estimate at a bar uses every earlier bar of its window
+        return SLOTS - 1 if self.time_weighted else 0
+
+    def reset(self) -> None:
+        self._funding = FundingEstimator()
+
+    def _predicted(self, ts_ms, mark, index) -> np.ndarray:
+        if self.time_weighted:
+            return predicted_funding_twap(ts_ms, mark, index)
+        return _instant(mark, index)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
-        mark = df[["close"]].copy()
-        idx = df[["index_close"]].rename(columns={"index_close": "close"})
-        pred = predicted_funding(mark, idx)
-        minutes = df.index.map(lambda ts: minutes_to_settlement(int(ts.timestamp() * 1000)))
-        signal = pd.Series(0, index=df.index)
-        cond_short = (pred > 0.003) & (minutes >= 5)
-        cond_long = (pred < -0.003) & (minutes >= 5)
-        signal[cond_short] = -1
-        signal[cond_long] = 1
-        signal[minutes <= 3] = 0
+        if isinstance(df, BarFrame):
+            pred = self._predicted(df.ts, df["close"], df["index_close"])
+            df["predicted_funding"] = pred
+            return _carry(pred, minutes_to_settlement_array(df.ts))
+        ts_ms = pd.DatetimeIndex(df.index).as_unit("ms").asi8
+        pred = self._predicted(ts_ms, df["close"].to_numpy(), df["index_close"].to_numpy())
+        signal = _carry(pred, minutes_to_settlement_array(ts_ms))
+        return pd.Series(signal.astype(np.int64), index=df.index)
+
+    def generate_panel_signals(self, panel) -> np.ndarray:
+        ts_ms = panel.ts_ms
+        pred = self._predicted(ts_ms, panel["close"], panel["index_close"])
+        signal = _carry(pred, minutes_to_settlement_array(ts_ms))
+        signal[~panel.mask] = 0
+        panel.fields["predicted_funding"] = pred
         return signal
+
+    def on_bar(self, ts_ms: int, bar: dict) -> int:
+        mark = bar["close"]
+        index = bar["index_close"]
+        if self.time_weighted:
+            pred = self._funding.update(ts_ms, mark, index)
+        else:
+            pred = min(max((mark - index) / index, -0.0075), 0.0075)
+        minutes = minutes_to_settlement(ts_ms)
+        if minutes <= 3:
+            return 0
+        if pred < -0.003 and minutes >= 5:
+            return 1
+        if pred > 0.003 and minutes >= 5:
+            return -1
+        return 0
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
+from backtests.barframe import BarFrame
 from backtests.core import Strategy
+from utils.rolling import RollingExtreme
 
 DEFAULT_RISK_MULT = 1.0
 
@@ -7,9 +10,22 @@ DEFAULT_RISK_MULT = 1.0
 RANGE_THR_PCT = 0.001   # 0.10 %
 BREAKOUT_THR_PCT = 0.0005  # 0.05 %
 
+def _breakout(high_roll, low_roll, close, range_threshold, breakout_threshold):
+    """Array version of the breakout rule; returns ``(int8 signal, range)``."""
+    rng = high_roll - low_roll
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cond = (rng / low_roll) >= range_threshold
+    signal = np.zeros(rng.shape, dtype=np.int8)
+    signal[cond & (close > high_roll * (1 + breakout_threshold))] = 1
+    signal[cond & (close < low_roll * (1 - breakout_threshold))] = -1
+    return signal, rng
+
+
 class VolBreakout(Strategy):
     """Simple volatility breakout strategy."""
 
+    CACHE_MODULES = ("utils.rolling",)
+
     def __init__(
         self,
         lookback: int = 15,
@@ -37,6 +53,16 @@ class VolBreakout(Strategy):
         self.range_threshold = range_threshold
         self.breakout_threshold = breakout_threshold
         self.risk_mult = risk_mult
+        self.reset()
+
+    @property
+    def warmup_bars(self) -> int:
+        return self.lookback
+
+    def reset(self) -> None:
+        self._high_roll = RollingExtreme(self.lookback, "max")
+        self._low_roll = RollingExtreme(self.lookback, "min")
+        self.last_range = float("nan")
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         base_col = None
@@ -47,6 +73,9 @@ class VolBreakout(Strategy):
         if base_col is None:
             raise ValueError("No price column found")
 
+        if isinstance(df, BarFrame):
+            return self._bar_signals(df, base_col)
+
         if "high" not in df.columns:
             df = df.copy()
             df["high"] = df[base_col]
@@ -70,3 +99,71 @@ class VolBreakout(Strategy):
         signal[short_cond] = -1
         df['range'] = rng
         return signal
+
+    def _bar_signals(self, bars: BarFrame, base_col: str) -> np.ndarray:
+        if {"high", "low", "close"}.issubset(bars.columns):
+            high, low, close = bars["high"], bars["low"], bars["close"]
+        else:
+            high = low = close = bars[base_col]
+        high_roll = pd.Series(high, copy=False).shift(1).rolling(self.lookback).max()
+        low_roll = pd.Series(low, copy=False).shift(1).rolling(self.lookback).min()
+        signal, rng = _breakout(
+            high_roll.to_numpy(),
+            low_roll.to_numpy(),
+            close,
+            self.range_threshold,
+            self.breakout_threshold,
+        )
+        bars["range"] = rng
+        return signal
+
+    def generate_panel_signals(self, panel) -> np.ndarray:
+        f = panel.fields
+        base_col = next((c for c in ("price", "close", "open") if c in f), None)
+        if base_col is None:
+            raise ValueError("No price column found")
+        if {"high", "low", "close"}.issubset(f):
+            high, low, close = f["high"], f["low"], f["close"]
+        else:
+            high = low = close = f[base_col]
+
+        # one rolling pass over all symbols, bars x symbols
+        high_roll = pd.DataFrame(panel.compact(high).T).shift(1).rolling(self.lookback).max()
+        low_roll = pd.DataFrame(panel.compact(low).T).shift(1).rolling(self.lookback).min()
+        signal, rng = _breakout(
+            high_roll.to_numpy().T,
+            low_roll.to_numpy().T,
+            panel.compact(close),
+            self.range_threshold,
+            self.breakout_threshold,
+        )
+        f["range"] = panel.expand(rng)
+        return panel.expand(signal, fill=0)
+
+    def on_bar(self, ts_ms: int, bar: dict) -> int:
+        base = None
+        for c in ("price", "close", "open"):
+            if c in bar:
+                base = bar[c]
+                break
+        if base is None:
+            raise ValueError("No price column found")
+        if {"high", "low", "close"}.issubset(bar):
+            high, low, close = bar["high"], bar["low"], bar["close"]
+        else:
+            high = low = close = base
+
+        # the window excludes the current bar, as with shift(1) above
+        high_roll = self._high_roll.value
+        low_roll = self._low_roll.value
+        self._high_roll.append(float(high))
+        self._low_roll.append(float(low))
+        rng = high_roll - low_roll
+        self.last_range = rng
+        if not low_roll > 0 or not rng / low_roll >= self.range_threshold:
+            return 0
+        if close < low_roll * (1 - self.breakout_threshold):
+            return -1
+        if close > high_roll * (1 + self.breakout_threshold):
+            return 1
+        return 0
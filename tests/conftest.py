@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def random_walk_frame(periods=None, seed=0, start='2024-02-01', end=None,
+                      index_close=True, flat=False):
+    """Minute OHLC bars from a seeded random walk, indexed like ``load_data``.
+
+    Give ``periods`` or ``end``. ``flat`` sets open, high and low to the
+    close, as the live bot only sees closes.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, end, periods=periods, freq='1min').as_unit('ms')
+    n = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    if flat:
+        df = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close}, index=index)
+    else:
+        df = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.0005, n)),
+            'high': close * (1 + rng.uniform(0, 0.003, n)),
+            'low': close * (1 - rng.uniform(0, 0.003, n)),
+            'close': close,
+        }, index=index)
+    if index_close:
+        df['index_close'] = close * (1 + rng.normal(0, 0.004, n))
+    return df
+
+
+@pytest.fixture
+def make_frame():
+    return random_walk_frame
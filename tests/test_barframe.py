@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from backtests import core
+from backtests.barframe import BarFrame
+from backtests.core import cagr, max_drawdown, sharpe_ratio
+from backtests.run_backtest import load_bars
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+
+def test_columns_are_views(make_frame):
+    bars = BarFrame.from_frame(make_frame(10, seed=2), dtype=np.float32)
+    assert bars['close'].dtype == np.float32
+    assert bars['close'].flags['C_CONTIGUOUS']
+    assert np.shares_memory(bars['close'], bars.series('close').to_numpy())
+
+
+def test_simulate_matches_dataframe(make_frame):
+    df = make_frame(3000, seed=2)
+    for strat in (VolBreakout(lookback=10), FundingCarry()):
+        trades, equity = strat.simulate(df.copy())
+        b_trades, b_equity = strat.simulate(BarFrame.from_frame(df))
+        pd.testing.assert_frame_equal(trades, b_trades)
+        assert np.array_equal(equity.to_numpy(), b_equity['equity'])
+        assert cagr(b_equity) == cagr(equity)
+        assert max_drawdown(b_equity) == max_drawdown(equity)
+        assert sharpe_ratio(b_equity) == sharpe_ratio(equity)
+
+
+def test_simulate_chunks_match_single_pass(make_frame, monkeypatch):
+    bars = BarFrame.from_frame(make_frame(3000, seed=2), dtype=np.float32)
+    strat = VolBreakout(lookback=30)
+    signals = strat.generate_signals(bars)
+    trades, equity = strat.simulate(bars, signals)
+    assert len(trades) > 3
+    monkeypatch.setattr(core, 'SIM_CHUNK', 97)
+    c_trades, c_equity = strat.simulate(bars, signals)
+    pd.testing.assert_frame_equal(c_trades, trades)
+    assert np.array_equal(c_equity['equity'], equity['equity'])
+
+
+class FakeCursor:
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params):
+        self.rows = self.tables['index1' if 'index1' in query else 'mark1']
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self):
+        return FakeCursor(self.tables)
+
+
+def test_load_bars_left_joins_index():
+    conn = FakeConn({
+        'mark1': [(0, 1.0, 2.0, 0.5, 1.5), (60000, 1.5, 2.5, 1.0, 2.0), (120000, 2.0, 3.0, 1.5, 2.5)],
+        'index1': [(0, 1.4), (120000, 2.4)],
+    })
+    bars = load_bars(conn, 'BTCUSDT', '1970-01-01', '1970-01-02', with_index=True)
+    assert bars.ts.tolist() == [0, 60000, 120000]
+    assert bars['close'].tolist() == [1.5, 2.0, 2.5]
+    np.testing.assert_array_equal(bars['index_close'], [1.4, np.nan, 2.4])
@@ -0,0 +1,116 @@
+import contextlib
+import json
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+import run_batch
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+# the pool workers must inherit the monkeypatched loader
+needs_fork = pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(), reason='needs the fork start method'
+)
+
+def write_jobs(tmp_path):
+    spec = {
+        'defaults': {'start': '2024-01-01', 'end': '2024-01-02'},
+        'jobs': [
+            {'strategy': 'vol_breakout', 'params': {'lookback': 10}, 'symbols': ['BTCUSDT', 'ETHUSDT']},
+            {'strategy': 'funding_carry', 'symbol': 'BTCUSDT', 'start': '2024-01-01 12:00', 'end': '2024-01-03'},
+            {'strategy': 'vol_breakout', 'symbol': 'BTCUSDT', 'start': '2024-01-05', 'end': '2024-01-06'},
+        ],
+    }
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+
+def test_plan_merges_overlapping_windows(tmp_path):
+    jobs = run_batch.load_jobs(write_jobs(tmp_path))
+    assert [j['symbol'] for j in jobs] == ['BTCUSDT', 'ETHUSDT', 'BTCUSDT', 'BTCUSDT']
+    groups = run_batch.plan(jobs)
+    summary = [(g['symbol'], str(g['start']), str(g['end']), g['with_index'], [j['id'] for j in g['jobs']])
+               for g in groups]
+    assert summary == [
+        ('BTCUSDT', '2024-01-01 00:00:00', '2024-01-03 00:00:00', True, [0, 2]),
+        ('BTCUSDT', '2024-01-05 00:00:00', '2024-01-06 00:00:00', False, [3]),
+        ('ETHUSDT', '2024-01-01 00:00:00', '2024-01-02 00:00:00', False, [1]),
+    ]
+
+
+def test_yaml_jobs_match_json(tmp_path):
+    pytest.importorskip('yaml')  # optional, like YAML job files themselves
+    path = write_jobs(tmp_path)
+    yaml_path = tmp_path / 'jobs.yaml'
+    yaml_path.write_text(open(path).read())  # JSON is valid YAML
+    assert run_batch.load_jobs(str(yaml_path)) == run_batch.load_jobs(path)
+
+
+@needs_fork
+def test_jobs_run_on_slices_of_one_load(make_frame, tmp_path, monkeypatch):
+    def fake_load(conn, symbol, start, end, with_index=False):
+        return make_frame(start=start, end=end, index_close=with_index)
+
+    monkeypatch.setattr(run_batch, 'load_data', fake_load)
+    monkeypatch.setattr(run_batch, 'pooled_conn', contextlib.nullcontext)
+    monkeypatch.setenv('SIGNAL_CACHE_DIR', '')
+    jobs = run_batch.load_jobs(write_jobs(tmp_path))
+    # workers report back through files
+    monkeypatch.setattr(run_batch, 'store_frame', _recording_store(run_batch.store_frame, tmp_path))
+    results = run_batch.run_batch(jobs, workers=2, context='fork')
+    assert len(list(tmp_path.glob('stored-*'))) == 3  # one load per group
+
+    full = make_frame(start='2024-01-01', end='2024-01-03')
+    expected = [
+        VolBreakout(lookback=10).simulate(full.loc[pd.Timestamp('2024-01-01'):pd.Timestamp('2024-01-02')].copy()),
+        FundingCarry().simulate(full.loc[pd.Timestamp('2024-01-01 12:00'):pd.Timestamp('2024-01-03')].copy()),
+    ]
+    rows = results.set_index('id').loc[[0, 2]].to_dict('records')
+    for row, (trades, equity) in zip(rows, expected):
+        assert row['error'] is None
+        assert row['trades'] == len(trades)
+        assert row['bars'] == len(equity)
+        assert row['sharpe'] == run_batch.sharpe_ratio(equity)
+    assert results['error'].isna().all()
+
+
+@needs_fork
+def test_failed_load_only_fails_its_group(make_frame, tmp_path, monkeypatch):
+    def fake_load(conn, symbol, start, end, with_index=False):
+        if symbol == 'ETHUSDT':
+            raise ConnectionError('lost connection')
+        return make_frame(start=start, end=end, index_close=with_index)
+
+    monkeypatch.setattr(run_batch, 'load_data', fake_load)
+    monkeypatch.setattr(run_batch, 'pooled_conn', contextlib.nullcontext)
+    results = run_batch.run_batch(run_batch.load_jobs(write_jobs(tmp_path)), workers=2, context='fork')
+    assert results['id'].tolist() == [0, 1, 2, 3]
+    errors = results.set_index('id')['error']
+    assert 'lost connection' in errors[1]
+    assert errors.drop(1).isna().all()
+
+
+def _recording_store(store, tmp_path):
+    def record(df, path):
+        (tmp_path / f'stored-{os.path.basename(path)}').touch()
+        store(df, path)
+    return record
+
+
+def test_open_slice_matches_loc(make_frame, tmp_path):
+    df = make_frame(start='2024-01-01', end='2024-01-02')
+    run_batch.store_frame(df, str(tmp_path / 'frame'))
+    got = run_batch.open_slice(str(tmp_path / 'frame'), '2024-01-01 06:00', '2024-01-01 18:00')
+    expected = df.loc[pd.Timestamp('2024-01-01 06:00'):pd.Timestamp('2024-01-01 18:00')]
+    pd.testing.assert_frame_equal(got, expected, check_names=False, check_freq=False)
+
+
+def test_bad_job_is_reported_not_raised(make_frame):
+    job = {'id': 0, 'strategy': 'vol_breakout', 'params': {'nope': 1},
+           'symbol': 'BTCUSDT', 'start': '2024-01-01', 'end': '2024-01-02'}
+    row = run_batch.run_job(job, make_frame(start='2024-01-01', end='2024-01-02', index_close=False))
+    assert 'nope' in row['error']
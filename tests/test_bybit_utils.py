@@ -1,4 +1,4 @@
-from utils.bybit import base_url, get_index_price, fetch_funding
+from utils.bybit import base_url, get_index_price, fetch_funding, get_kline
 
 
 class DummyResponse:
@@ -39,3 +39,23 @@ def test_fetch_funding_testnet_skips_call(monkeypatch):
     res = fetch_funding('BTCUSDT', net='testnet')
     assert res == 0.0
     assert 'hit' not in called
+
+
+def test_get_kline_sorts_oldest_first(monkeypatch):
+    captured = {}
+
+    class KlineResponse(DummyResponse):
+        def json(self):
+            return {"result": {"list": [
+                ["120000", "2", "3", "1", "2.5"],
+                ["60000", "1", "2", "0.5", "1.5"],
+            ]}}
+
+    def fake_get(url, params=None, timeout=10):
+        captured["url"] = url
+        return KlineResponse()
+
+    monkeypatch.setattr("utils.bybit.requests.get", fake_get)
+    rows = get_kline("BTCUSDT", 0, 120000, kind="index")
+    assert captured["url"].endswith("/v5/market/index-price-kline")
+    assert rows == [[60000, 1.0, 2.0, 0.5, 1.5], [120000, 2.0, 3.0, 1.0, 2.5]]
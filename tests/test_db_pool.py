@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from utils.db import ConnectionPool
+
+
+class FakeConn:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=True):
+        if not self.alive:
+            raise ConnectionError("gone")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_connections_are_reused_and_rolled_back():
+    made = []
+    pool = ConnectionPool(max_size=2, connect=lambda: made.append(FakeConn()) or made[-1])
+    with pool.connection() as a:
+        pass
+    with pool.connection() as b:
+        pass
+    assert a is b and len(made) == 1
+    assert a.rollbacks == 2
+
+
+def test_dead_connection_is_replaced_on_checkout():
+    made = []
+    pool = ConnectionPool(max_size=1, connect=lambda: made.append(FakeConn()) or made[-1])
+    with pool.connection() as a:
+        pass
+    a.alive = False
+    with pool.connection() as b:
+        assert b is not a
+    assert a.closed and len(made) == 2
+
+
+def test_size_cap_blocks_then_times_out():
+    pool = ConnectionPool(max_size=1, connect=FakeConn, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    threading.Timer(0.01, pool.release, args=(held,)).start()
+    pool.timeout = 1.0
+    assert pool.acquire() is held
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from backtests.core import Strategy
+from backtests.engine import EventEngine, frame_stream, merge_streams
+from backtests.run_backtest import iter_bars
+
+
+class Scripted(Strategy):
+    """Signals long on every 30th bar of its symbol and short 10 bars later."""
+
+    def __init__(self):
+        self.n = 0
+
+    def on_bar(self, ts_ms, bar):
+        self.n += 1
+        return {1: 1, 11: -1}.get(self.n % 30, 0)
+
+
+def test_merge_is_lazy_and_time_ordered():
+    pulled = {'A': 0, 'B': 0}
+
+    def stream(sym, times):
+        for t in times:
+            pulled[sym] += 1
+            yield t, {'sym': sym}
+
+    merged = merge_streams({'A': stream('A', [0, 2, 4, 6]), 'B': stream('B', [1, 2, 3])})
+    first = [next(merged) for _ in range(3)]
+    assert [(t, s) for t, s, _ in first] == [(0, 'A'), (1, 'B'), (2, 'A')]
+    # at most one bar per stream is read ahead
+    assert pulled['A'] <= 3 and pulled['B'] <= 2
+    assert [(t, s) for t, s, _ in merged] == [(2, 'B'), (3, 'B'), (4, 'A'), (6, 'A')]
+
+
+def test_shared_account_books_every_trade(make_frame):
+    frames = {
+        'BTC': make_frame(590, 1, '2024-01-01', index_close=False),
+        'ETH': make_frame(590, 2, '2024-01-01 00:05', index_close=False),
+    }
+    engine = EventEngine([('scripted', Scripted)], capital=1000.0, allocation=0.2)
+    trades, equity = engine.run({s: frame_stream(df) for s, df in frames.items()})
+    assert set(trades.symbol) == {'BTC', 'ETH'}
+    assert (trades.exit_time > trades.entry_time).all()
+    # flat at the end: equity is capital plus every realised trade
+    assert engine.open_count == 0
+    assert np.isclose(equity.iloc[-1], 1000.0 + trades.pnl_value.sum())
+    assert equity.index.is_monotonic_increasing and equity.index.is_unique
+    assert len(equity) == len(frames['BTC'].index.union(frames['ETH'].index))
+    assert not engine.rejected
+    assert np.allclose(trades.weight, 0.2)
+
+
+def test_position_caps_and_margin(make_frame):
+    frames = {s: make_frame(300, k, '2024-01-01', index_close=False) for k, s in enumerate(('A', 'B', 'C'))}
+
+    def run(**kw):
+        engine = EventEngine([('s', Scripted)], **kw)
+        trades, _ = engine.run({s: frame_stream(df) for s, df in frames.items()})
+        return engine, trades
+
+    engine, trades = run(allocation=0.3)
+    assert len(trades.groupby('entry_time').size().loc[lambda n: n == 3]) > 0
+    engine, trades = run(allocation=0.3, max_positions=2)
+    assert trades.groupby('entry_time').size().max() == 2
+    assert engine.rejected['max_positions'] > 0
+    engine, _ = run(allocation=0.45)
+    assert engine.rejected['margin'] > 0
+    engine, _ = run(allocation=0.45, leverage=2.0)
+    assert not engine.rejected
+
+
+class RangeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params):
+        _, start, end = params
+        self.result = [r for r in self.rows if start <= r[0] <= end]
+
+    def fetchall(self):
+        return self.result
+
+
+class RangeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def cursor(self):
+        self.queries += 1
+        return RangeCursor(self.rows)
+
+
+def test_iter_bars_streams_in_chunks():
+    rows = [(t * 60_000, 1.0, 2.0, 0.5, float(t)) for t in range(3 * 1440)]
+    conn = RangeConn(rows)
+    got = list(iter_bars(conn, 'BTCUSDT', '1970-01-01', '1970-01-03 23:59',
+                         chunk=pd.Timedelta(hours=12)))
+    assert [ts for ts, _ in got] == [r[0] for r in rows]
+    assert got[5][1] == {'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 5.0}
+    assert conn.queries == 6
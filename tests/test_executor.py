@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+
+from utils.executor import Order, OrderExecutor
+
+
+def test_batches_orders_and_records_latency(monkeypatch):
+    calls = []
+
+    def fake_batch(orders, key, secret, net):
+        calls.append([o["symbol"] for o in orders])
+        return {
+            "retCode": 0,
+            "result": {"list": [{"orderId": f"id{i}"} for i in range(len(orders))]},
+            "retExtInfo": {"list": [{"code": 0, "msg": "OK"}] * len(orders)},
+        }
+
+    monkeypatch.setattr("utils.bybit.place_batch_order_post_only", fake_batch)
+    acked = []
+
+    async def on_ack(order):
+        acked.append(order)
+
+    async def run():
+        ex = OrderExecutor("k", "s", workers=1, batch_size=5, on_ack=on_ack)
+        for sym in ("BTCUSDT", "ETHUSDT", "SOLUSDT"):
+            await ex.submit(Order(sym, "Buy", 1.0, 100.0, "vol_breakout", datetime.utcnow()))
+        ex.start()
+        await ex.stop()
+        return ex
+
+    ex = asyncio.run(run())
+    assert calls == [["BTCUSDT", "ETHUSDT", "SOLUSDT"]]
+    assert [o.order_id for o in acked] == ["id0", "id1", "id2"]
+    assert ex.latency_stats()["count"] == 3
+
+
+def test_rejected_order_reports_error(monkeypatch):
+    def fake_place(*args):
+        return {"retCode": 10001, "retMsg": "bad qty", "result": {}}
+
+    monkeypatch.setattr("utils.bybit.place_order_post_only", fake_place)
+
+    async def run():
+        ex = OrderExecutor("k", "s", workers=2)
+        ex.start()
+        order = Order("BTCUSDT", "Sell", 1.0, 100.0, "funding_carry", datetime.utcnow())
+        await ex.submit(order)
+        await ex.stop()
+        return order
+
+    order = asyncio.run(run())
+    assert order.error == "bad qty"
+    assert order.latency is None
+
+
+def test_slow_ack_handler_does_not_block_sending(monkeypatch):
+    placed = []
+
+    def fake_place(symbol, *args):
+        placed.append(symbol)
+        return {"retCode": 0, "result": {"orderId": symbol}}
+
+    monkeypatch.setattr("utils.bybit.place_order_post_only", fake_place)
+    acked = []
+
+    async def run():
+        second_sent = asyncio.Event()
+
+        async def on_ack(order):
+            if order.symbol == "ETHUSDT":
+                second_sent.set()
+            # e.g. a funding lookup; must not stall the single worker
+            await second_sent.wait()
+            acked.append(order.symbol)
+
+        ex = OrderExecutor("k", "s", workers=1, on_ack=on_ack)
+        ex.start()
+        for sym in ("BTCUSDT", "ETHUSDT"):
+            await ex.submit(Order(sym, "Buy", 1.0, 100.0, "vol_breakout", datetime.utcnow()))
+        await asyncio.wait_for(ex.stop(), timeout=5)
+
+    asyncio.run(run())
+    assert placed == ["BTCUSDT", "ETHUSDT"]
+    assert sorted(acked) == ["BTCUSDT", "ETHUSDT"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from utils.funding import (
+    FundingEstimator,
+    compare_to_settled,
+    funding_from_premium,
+    predicted_funding_twap,
+    settlement_estimates,
+    time_weighted_premium,
+)
+
+
+def make_bars(periods=3 * 480 + 100, seed=4):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range('2024-03-01 05:00', periods=periods, freq='1min').as_unit('ms').asi8
+    index = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, periods)))
+    mark = index * (1 + rng.normal(0.0005, 0.001, periods))
+    keep = rng.random(periods) > 0.05  # a few missing bars
+    return ts[keep], mark[keep], index[keep]
+
+
+def test_matches_weighted_mean_per_window():
+    ts, mark, index = make_bars()
+    premium = (mark - index) / index
+    got = time_weighted_premium(ts, premium)
+    df = pd.DataFrame({'p': premium, 'w': (ts % 28_800_000) // 60_000 + 1, 'win': ts // 28_800_000})
+    df['wp'] = df.p * df.w
+    g = df.groupby('win')
+    expected = g.wp.cumsum() / g.w.cumsum()
+    np.testing.assert_allclose(got, expected.to_numpy(), rtol=1e-12)
+
+
+def test_incremental_is_bit_identical_and_skips_nan():
+    ts, mark, index = make_bars()
+    index[7] = np.nan
+    batch = predicted_funding_twap(ts, mark, index)
+    est = FundingEstimator()
+    live = [est.update(int(t), float(m), float(i)) for t, m, i in zip(ts, mark, index)]
+    assert np.array_equal(batch, np.array(live), equal_nan=True)
+    assert not np.isnan(batch[7])
+
+
+def test_panel_rows_match_single_symbol():
+    ts, mark, index = make_bars()
+    premium = (mark - index) / index
+    panel = np.vstack([premium, np.where(np.arange(len(ts)) % 3, premium, np.nan)])
+    got = time_weighted_premium(ts, panel)
+    assert np.array_equal(got[0], time_weighted_premium(ts, premium))
+    valid = ~np.isnan(panel[1])
+    assert np.array_equal(got[1][valid], time_weighted_premium(ts[valid], panel[1][valid]))
+
+
+def test_settlement_estimates_line_up_with_funding8h():
+    ts = pd.date_range('2024-03-01 00:00', periods=3 * 480 + 10, freq='1min').as_unit('ms').asi8
+    index = np.full(len(ts), 100.0)
+    mark = index * (1 + np.repeat([0.002, 0.0001, -0.003, 0.0], [480, 480, 480, 10]))
+    est = settlement_estimates(ts, mark, index)
+    assert list(est.index) == list(pd.to_datetime(['2024-03-01 08:00', '2024-03-01 16:00', '2024-03-02 00:00']))
+    settled = pd.Series([0.0015, 0.0001, -0.0025], index=est.index)
+    cmp = compare_to_settled(est, settled)
+    np.testing.assert_allclose(cmp['error'], 0, atol=1e-15)
+    assert np.isclose(funding_from_premium(0.0003), 0.0001)
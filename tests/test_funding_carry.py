@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+from strategies.funding_carry import FundingCarry
+
+
+@pytest.mark.parametrize('time_weighted', [False, True])
+def test_on_bar_matches_generate_signals(time_weighted):
+    rng = np.random.default_rng(1)
+    index = pd.date_range('2024-02-01 07:00', periods=180, freq='1min')
+    index_close = np.full(len(index), 100.0)
+    # a persistent premium that flips sign, so the time-weighted estimate trades too
+    drift = np.where(np.arange(len(index)) < 90, 0.004, -0.004)
+    close = index_close * (1 + drift + rng.normal(0, 0.004, len(index)))
+    df = pd.DataFrame({'close': close, 'index_close': index_close}, index=index)
+    strat = FundingCarry(time_weighted=time_weighted)
+    expected = strat.generate_signals(df)
+    got = [
+        strat.on_bar(int(ts.timestamp() * 1000), {'close': c, 'index_close': i})
+        for ts, c, i in zip(df.index, close, index_close)
+    ]
+    assert (expected == 1).any() and (expected == -1).any()
+    assert got == expected.tolist()
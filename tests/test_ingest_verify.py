@@ -0,0 +1,109 @@
+import run_ingest
+from run_ingest import DAY_MS, day_checksums, normalize_row, verify_table
+
+
+def kline(ts, close):
+    return [str(ts), '100.5', '101', '99.25', str(close)]
+
+
+def api_rows(day, close=100.0):
+    return [kline(day + m * 60_000, close + m) for m in range(3)]
+
+
+def test_checksum_matches_between_api_and_db_rows():
+    day = 5 * DAY_MS
+    rows = api_rows(day)
+    from_api = day_checksums(normalize_row('mark1', r) for r in rows)
+    from_db = day_checksums([(int(r[0]), *map(float, r[1:])) for r in reversed(rows)])
+    assert from_api == from_db == {day: (3, from_api[day][1])}
+    changed = day_checksums([(int(r[0]), *map(float, r[1:])) for r in api_rows(day, 100.5)])
+    assert changed != from_api
+    funding = {'fundingRateTimestamp': str(day), 'fundingRate': '0.0001'}
+    assert normalize_row('funding8h', funding) == (day, 0.0001)
+
+
+def test_only_unverified_changed_and_recent_days_are_fetched(monkeypatch):
+    days = [d * DAY_MS for d in range(100, 106)]
+    api = {d: api_rows(d) for d in days}
+    del api[days[5]]  # no longer served by the API
+    db_rows = {d: api_rows(d) for d in days}
+    db_rows[days[1]] = api_rows(days[1], 90.0)  # corrupted after verification
+    db_rows[days[3]] = api_rows(days[3], 90.0)  # never verified, wrong
+    good = lambda d: day_checksums(normalize_row('mark1', r) for r in api[d])[d]
+    recorded = {days[0]: (good(days[0]), 0), days[1]: (good(days[1]), 0)}
+    fetch_calls, saved, replaced = [], {}, []
+
+    def fake_fetch(table, symbol, first, last):
+        fetch_calls.append((first, last))
+        return {d: api[d] for d in api if first <= d <= last}
+
+    monkeypatch.setattr(run_ingest, 'stored_rows', lambda conn, t, s, a, b: [
+        normalize_row('mark1', r) for d in days for r in db_rows[d]])
+    monkeypatch.setattr(run_ingest, 'load_verified', lambda conn, t, s, a, b: recorded)
+    monkeypatch.setattr(run_ingest, 'save_verified', lambda conn, t, s, sums, now: saved.update(sums))
+    monkeypatch.setattr(run_ingest, 'replace_day', lambda conn, t, s, day, rows: replaced.append(day))
+    monkeypatch.setattr(run_ingest, 'fetch_days', fake_fetch)
+
+    now = days[5] + DAY_MS + 1
+    fetched, repaired = verify_table(None, 'mark1', 'BTCUSDT', days[0], days[5] + DAY_MS,
+                                     recheck_days=2, now=now, cycle_days=0)
+    # day 0 is verified and unchanged: no request at all
+    assert fetch_calls == [(days[1], days[5])]
+    assert replaced == [days[1], days[3]]
+    assert (fetched, repaired) == (4, 2)
+    assert sorted(saved) == days[1:5]
+    assert saved[days[3]] == good(days[3])
+
+
+def test_failed_fetch_changes_nothing(monkeypatch):
+    day = 200 * DAY_MS
+
+    def boom(*args):
+        raise ConnectionError('down')
+
+    replaced = []
+    monkeypatch.setattr(run_ingest, 'stored_rows', lambda *a: [])
+    monkeypatch.setattr(run_ingest, 'load_verified', lambda *a: {})
+    monkeypatch.setattr(run_ingest, 'save_verified', lambda *a: replaced.append('save'))
+    monkeypatch.setattr(run_ingest, 'replace_day', lambda *a: replaced.append('replace'))
+    monkeypatch.setattr(run_ingest, 'fetch_days', boom)
+    assert verify_table(None, 'index1', 'BTCUSDT', day, day + DAY_MS) == (0, 0)
+    assert replaced == []
+
+
+def test_old_verified_days_are_rechecked_on_a_rolling_basis(monkeypatch):
+    days = [d * DAY_MS for d in range(300, 320)]
+    now = days[-1] + DAY_MS + 1
+    api = {d: api_rows(d) for d in days}
+    api[days[6]] = api_rows(days[6], 100.5)  # corrected by the exchange after the audit
+    good = {d: day_checksums(normalize_row('mark1', r) for r in api_rows(d))[d] for d in days}
+    age = {d: 1 for d in days}
+    age.update({days[2]: 40, days[3]: 35, days[6]: 25, days[9]: 20})
+    recorded = {d: (good[d], now - age[d] * DAY_MS) for d in days}
+    fetched_days, replaced = [], []
+
+    def fake_fetch(table, symbol, first, last):
+        got = {d: api[d] for d in api if first <= d <= last}
+        fetched_days.extend(got)
+        return got
+
+    monkeypatch.setattr(run_ingest, 'stored_rows', lambda conn, t, s, a, b: [
+        normalize_row('mark1', r) for d in days for r in api_rows(d)])
+    monkeypatch.setattr(run_ingest, 'load_verified', lambda conn, t, s, a, b: recorded)
+    monkeypatch.setattr(run_ingest, 'save_verified', lambda *a: None)
+    monkeypatch.setattr(run_ingest, 'replace_day', lambda conn, t, s, day, rows: replaced.append(day))
+    monkeypatch.setattr(run_ingest, 'fetch_days', fake_fetch)
+
+    def run(cycle_days):
+        fetched_days.clear()
+        verify_table(None, 'mark1', 'BTCUSDT', days[0], days[-1] + DAY_MS,
+                     recheck_days=0, now=now, cycle_days=cycle_days)
+        return sorted(fetched_days)
+
+    # 20 days over a 5-run cycle: the four verified longest ago
+    assert run(5) == [days[2], days[3], days[6], days[9]]
+    assert replaced == [days[6]]
+    # over a 50-run cycle only the oldest, plus any not verified within 22 days
+    assert run(50) == [days[2]]
+    assert run(22) == [days[2], days[3], days[6]]
+    assert run(0) == []
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from utils.journal import Journal, read_journal, segment_path, DAY_MS
+
+
+def test_journal_rotates_daily_and_reads_range(tmp_path):
+    journal = Journal(tmp_path, flush_interval=0.01)
+    base = pd.Timestamp('2024-02-01 23:58', tz='UTC')
+    for i in range(4):
+        ts = base + pd.Timedelta(minutes=i)
+        journal.write(ts.to_pydatetime(), 'BTCUSDT', 'vol_breakout', 'Buy', 1.0, 100.0 + i)
+    journal.close()
+
+    day = int(base.timestamp() * 1000) // DAY_MS
+    assert segment_path(tmp_path, day).name == '20240201.jsg'
+    assert segment_path(tmp_path, day + 1).exists()
+
+    df = read_journal(tmp_path, '2024-02-01', '2024-02-03')
+    assert list(df.price) == [100.0, 101.0, 102.0, 103.0]
+    assert list(df.symbol.unique()) == ['BTCUSDT']
+    assert df.timestamp.iloc[2] == pd.Timestamp('2024-02-02 00:00', tz='UTC')
+
+    late = read_journal(tmp_path, '2024-02-02', '2024-02-03')
+    assert list(late.price) == [102.0, 103.0]
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    journal = Journal(tmp_path)
+    journal.write(0, 'ETHUSDT', 'funding_carry', 'Sell', 2.0, 50.0)
+    journal.close()
+    with open(segment_path(tmp_path, 0), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    df = read_journal(tmp_path, '1970-01-01', '1970-01-01 23:59')
+    assert len(df) == 1 and df.side[0] == 'Sell'
+
+
+def test_reopen_drops_partial_record_before_appending(tmp_path):
+    journal = Journal(tmp_path)
+    journal.write(0, 'ETHUSDT', 'funding_carry', 'Sell', 2.0, 50.0)
+    journal.close()
+    with open(segment_path(tmp_path, 0), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    journal = Journal(tmp_path)
+    journal.write(60_000, 'BTCUSDT', 'vol_breakout', 'Buy', 1.0, 100.0)
+    journal.close()
+    df = read_journal(tmp_path, '1970-01-01', '1970-01-01 23:59')
+    assert list(df.symbol) == ['ETHUSDT', 'BTCUSDT']
+    assert list(df.price) == [50.0, 100.0]
+
+
+def test_long_names_are_rejected(tmp_path):
+    journal = Journal(tmp_path)
+    with pytest.raises(ValueError, match='strategy'):
+        journal.write(0, 'BTCUSDT', 'x' * 21, 'Buy', 1.0, 100.0)
+    journal.close()
+
+
+def test_writer_failure_is_raised(tmp_path, monkeypatch):
+    journal = Journal(tmp_path, flush_interval=0.01)
+
+    def broken(day):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(journal, '_segment', broken)
+    journal.write(0, 'BTCUSDT', 'vol_breakout', 'Buy', 1.0, 100.0)
+    journal._thread.join(timeout=5)
+    with pytest.raises(RuntimeError) as exc:
+        journal.write(60_000, 'BTCUSDT', 'vol_breakout', 'Sell', 1.0, 101.0)
+    assert 'disk full' in str(exc.value.__cause__)
+    with pytest.raises(RuntimeError):
+        journal.close()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from backtests import run_backtest
+from utils import packed
+
+HOUR = 1_700_002_800_000  # an hour boundary
+
+
+class FakeCursor:
+    """Just enough SQL for the ``*_packed`` tables."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        table = sql.split("FROM ")[1].split()[0]
+        symbol, lo, hi = params
+        rows = self.tables.get(table, {})
+        self.rows = sorted((h, b) for (s, h), b in rows.items() if s == symbol and lo <= h <= hi)
+
+    def executemany(self, sql, values):
+        table = sql.split("INTO ")[1].split()[0]
+        for symbol, hour, blob in values:
+            self.tables.setdefault(table, {})[(symbol, hour)] = blob
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    def __init__(self):
+        self.tables = {}
+
+    def cursor(self):
+        return FakeCursor(self.tables)
+
+    def commit(self):
+        pass
+
+
+def api_bars(n, start=HOUR, price=27123.4, step=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = start + np.arange(n, dtype=np.int64) * 60_000
+    close = price + np.cumsum(rng.integers(-30, 31, n)) * step
+    rows = [
+        [str(t), f"{c + 0.3:.1f}", f"{c + 0.9:.1f}", f"{c - 0.7:.1f}", f"{c:.1f}"]
+        for t, c in zip(ts.tolist(), close.tolist())
+    ]
+    ohlc = np.array([[float(v) for v in r[1:]] for r in rows])
+    return ts, ohlc
+
+
+def test_round_trip_is_bit_exact_with_gaps():
+    ts, ohlc = api_bars(60)
+    keep = np.ones(60, dtype=bool)
+    keep[[0, 17, 59]] = False
+    blob = packed.encode_hour(HOUR, ts[keep], ohlc[keep], decimals=1)
+    out_ts, out = packed.decode_hour(HOUR, blob)
+    assert np.array_equal(out_ts, ts[keep])
+    assert out.tobytes() == ohlc[keep].tobytes()
+    # 57 bars x 4 prices in two bytes each, against 8 bytes a DOUBLE
+    assert len(blob) < 57 * 4 * 8 / 3
+
+
+def test_decimals_widen_and_fall_back_to_raw():
+    ts, ohlc = api_bars(5)
+    ohlc[2, 1] = float("27150.123")
+    blob = packed.encode_hour(HOUR, ts, ohlc, decimals=1)
+    assert packed.decode_hour(HOUR, blob)[1].tobytes() == ohlc.tobytes()
+    ohlc[3, 0] = 1 / 3
+    blob = packed.encode_hour(HOUR, ts, ohlc, decimals=1)
+    assert packed.decode_hour(HOUR, blob)[1].tobytes() == ohlc.tobytes()
+    assert packed.tick_decimals("0.10") == 1 and packed.tick_decimals("5") == 0
+
+
+def test_write_merges_hours_and_later_bars_win():
+    conn = FakeConn()
+    ts, ohlc = api_bars(150)
+    packed.write_packed(conn, "mark1", "BTCUSDT", ts[:90], ohlc[:90], 1)
+    fixed = ohlc[80:].copy()
+    fixed[0] += 1.0
+    packed.write_packed(conn, "mark1", "BTCUSDT", ts[80:], fixed, 1)
+    assert len(conn.tables["mark1_packed"]) == 3
+    out_ts, out = packed.load_packed(conn, "mark1", "BTCUSDT", int(ts[0]), int(ts[-1]))
+    expected = np.concatenate([ohlc[:80], fixed])
+    assert np.array_equal(out_ts, ts) and out.tobytes() == expected.tobytes()
+    out_ts, _ = packed.load_packed(conn, "mark1", "BTCUSDT", int(ts[70]), int(ts[100]))
+    assert np.array_equal(out_ts, ts[70:101])
+
+
+def test_load_paths_match_row_layout(monkeypatch):
+    monkeypatch.setenv("BAR_LAYOUT", "packed")
+    conn = FakeConn()
+    ts, ohlc = api_bars(200)
+    idx_ts, idx = api_bars(200, price=27100.0, seed=1)
+    packed.write_packed(conn, "mark1", "BTCUSDT", ts, ohlc, 1)
+    packed.write_packed(conn, "index1", "BTCUSDT", idx_ts[5:], idx[5:], 1)
+    start = str(pd.Timestamp(int(ts[10]), unit="ms"))
+    end = str(pd.Timestamp(int(ts[150]), unit="ms"))
+
+    df = run_backtest.load_data(conn, "BTCUSDT", start, end, with_index=True)
+    expected = pd.DataFrame(
+        ohlc[10:151], columns=["open", "high", "low", "close"],
+        index=pd.Index(pd.to_datetime(pd.Series(ts[10:151]), unit="ms"), name="ts"),
+    )
+    expected["index_close"] = idx[10:151, 3]
+    pd.testing.assert_frame_equal(df, expected)
+
+    bars = run_backtest.load_bars(conn, "BTCUSDT", start, end, with_index=True)
+    assert np.array_equal(bars.ts, ts[10:151])
+    assert np.array_equal(bars["close"], ohlc[10:151, 3])
+    assert np.array_equal(bars["index_close"], idx[10:151, 3])
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from backtests.core import PortfolioSimulator
+from backtests.panel import Panel
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+
+def make_frames(make_frame):
+    frames = {}
+    for seed, sym in enumerate(['BTCUSDT', 'ETHUSDT', 'SOLUSDT']):
+        df = make_frame(400, seed, '2024-02-01 06:00')
+        # each symbol misses a different set of bars
+        drop = np.random.default_rng(seed).choice(len(df), 25 * seed, replace=False)
+        frames[sym] = df.drop(df.index[drop])
+    return frames
+
+
+def test_panel_signals_match_per_symbol(make_frame):
+    frames = make_frames(make_frame)
+    panel = Panel.from_frames(frames)
+    for strat in (VolBreakout(lookback=20), FundingCarry()):
+        signals = strat.generate_panel_signals(panel)
+        assert (signals[~panel.mask] == 0).all()
+        for i, sym in enumerate(panel.symbols):
+            expected = strat.generate_signals(frames[sym].copy())
+            assert (expected != 0).any()
+            assert signals[i, panel.mask[i]].tolist() == expected.tolist()
+
+
+def test_portfolio_from_panel_matches_frames(make_frame):
+    frames = make_frames(make_frame)
+    items = [('vol_breakout', sym, VolBreakout(), df.copy()) for sym, df in frames.items()]
+    summary, equity, trades = PortfolioSimulator(items).run()
+
+    panel = Panel.from_frames(frames)
+    p_summary, p_equity, p_trades = PortfolioSimulator.from_panel(
+        [('vol_breakout', VolBreakout())], panel
+    ).run()
+    pd.testing.assert_frame_equal(summary, p_summary)
+    pd.testing.assert_series_equal(equity, p_equity)
+    pd.testing.assert_frame_equal(trades, p_trades)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtests.barframe import BarFrame
+from backtests.parallel import simulate_parallel
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+
+@pytest.mark.parametrize('strat', [VolBreakout(lookback=10), VolBreakout(risk_mult=0.5), FundingCarry()])
+@pytest.mark.parametrize('slices', [2, 7, 40])
+def test_parallel_matches_serial(make_frame, strat, slices):
+    df = make_frame(6000, 21, '2024-05-01')
+    trades, equity = strat.simulate(df.copy())
+    p_trades, p_equity = simulate_parallel(strat, df.copy(), slices=slices, workers=2)
+    pd.testing.assert_frame_equal(p_trades, trades, check_exact=True)
+    pd.testing.assert_series_equal(p_equity, equity, check_exact=True)
+
+
+def test_parallel_barframe_float32(make_frame):
+    df = make_frame(6000, 21, '2024-05-01')
+    strat = VolBreakout(lookback=10)
+    trades, equity = strat.simulate(BarFrame.from_frame(df, dtype=np.float32))
+    p_trades, p_equity = simulate_parallel(
+        strat, BarFrame.from_frame(df, dtype=np.float32), slices=5, workers=2
+    )
+    pd.testing.assert_frame_equal(p_trades, trades, check_exact=True)
+    assert np.array_equal(p_equity['equity'], equity['equity'])
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from backtests.run_replay import replay
+from strategies.vol_breakout import VolBreakout
+from utils.journal import read_journal
+
+
+def test_replay_matches_batch_signals(make_frame, tmp_path):
+    data = {'BTCUSDT': make_frame(600, 0, flat=True), 'ETHUSDT': make_frame(600, 1, flat=True)}
+    bot, exchange = replay(data, '2024-02-01', '2024-02-01 10:00', journal_dir=tmp_path)
+
+    out = read_journal(tmp_path, '2024-02-01', '2024-02-02')
+    assert list(out.columns) == [
+        'timestamp', 'symbol', 'strategy', 'side', 'qty', 'price',
+        'fee', 'funding', 'realised_pnl',
+    ]
+    assert len(out) == len(exchange.fills) > 0
+
+    # every tick samples the close of the bar that just completed
+    for sym, df in data.items():
+        expected = VolBreakout().generate_signals(df[['close']])
+        expected = expected[expected != 0]
+        expected = expected[expected.index < pd.Timestamp('2024-02-01 09:59')]
+        got = out[(out.symbol == sym) & (out.strategy == 'vol_breakout')]
+        sampled = got.timestamp.dt.tz_localize(None)
+        bars = list(sampled.dt.floor('1min') - pd.Timedelta('1min'))
+        assert bars == list(expected.index)
+        assert list(got.side) == ['Buy' if s > 0 else 'Sell' for s in expected]
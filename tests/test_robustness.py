@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from backtests.core import cagr, max_drawdown, sharpe_ratio
+from backtests.robustness import (
+    _block_path_metrics,
+    _block_stats,
+    _years,
+    robustness_report,
+    shuffle_trades,
+)
+
+
+def make_equity(periods=20 * 60, freq='1min'):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=periods + 1, freq=freq)
+    return pd.Series(np.cumprod(1 + rng.normal(0.0005, 0.01, len(index))), index=index)
+
+
+def test_original_block_order_reproduces_point_metrics():
+    # daily bars over 2.5 years so cagr() is not zero
+    equity = make_equity(periods=900, freq='1D')
+    rets = equity.pct_change().dropna().to_numpy()
+    stats = _block_stats(rets, 30)
+    order = np.arange(len(rets) // 30)[None, :]
+    m = _block_path_metrics(stats, order, 30, _years(equity.index))
+    assert abs(cagr(equity)) > 0.01
+    assert np.isclose(m['maxdd'][0], max_drawdown(equity))
+    assert np.isclose(m['sharpe'][0], sharpe_ratio(equity))
+    assert np.isclose(m['cagr'][0], cagr(equity))
+
+
+def test_shuffle_drawdown_distribution_on_known_trades():
+    # two +10% and two -10% trades: of the six distinct orders, three put
+    # both losses after the peak (-19%), two alternate from a win or a
+    # loss (-10.9%) and one, loss-win-win-loss, never loses more than 10%
+    trades = pd.DataFrame({
+        'entry_price': [100.0] * 4,
+        'exit_price': [110.0, 110.0, 90.0, 90.0],
+        'pnl': [10.0, 10.0, -10.0, -10.0],
+    })
+    m = shuffle_trades(trades, 6000, 1.0, np.random.default_rng(1))
+    assert list(m) == ['maxdd']
+    dd = np.round(m['maxdd'], 6)
+    values, counts = np.unique(dd, return_counts=True)
+    assert list(values) == [-0.19, -0.109, -0.1]
+    assert np.allclose(counts / len(dd), [1 / 2, 1 / 3, 1 / 6], atol=0.03)
+
+
+def test_weighted_trades_compound_only_their_share():
+    trades = pd.DataFrame({
+        'entry_price': [100.0] * 4,
+        'exit_price': [110.0, 110.0, 90.0, 90.0],
+        'pnl': [10.0, 10.0, -10.0, -10.0],
+    })
+    full = shuffle_trades(trades, 200, 1.0, np.random.default_rng(1))
+    part = shuffle_trades(trades.assign(weight=0.2), 200, 1.0, np.random.default_rng(1))
+    # a 10% move on a fifth of the account moves equity by 2%
+    assert set(np.round(part['maxdd'], 6)) == {-0.0396, -0.020392, -0.02}
+    assert (part['maxdd'] > full['maxdd']).all()
+
+
+def test_report_layout():
+    trades = pd.DataFrame({
+        'entry_price': [100.0, 101.0], 'exit_price': [101.0, 99.0], 'pnl': [1.0, -2.0],
+    })
+    report = robustness_report(trades, make_equity(), n_paths=100, block=60, seed=0)
+    assert set(report.index.get_level_values('method')) == {'shuffle', 'costs', 'bootstrap'}
+    assert list(report.loc['shuffle'].index) == ['maxdd']
+    assert 'kelly_continuous' in report.loc['bootstrap'].index
+    assert list(report.columns) == ['p05', 'p50', 'p95', 'mean']
@@ -0,0 +1,43 @@
+import asyncio
+
+from utils.scheduler import MinuteScheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+
+
+def collect(sched, clock, work):
+    async def run():
+        ticks = []
+        async for tick in sched.ticks():
+            ticks.append(tick)
+            clock.now += work.pop(0) if work else 0.0
+            if len(ticks) == 4:
+                return ticks
+    return asyncio.run(run())
+
+
+def test_ticks_align_to_minute_without_drift():
+    clock = FakeClock(1_000_017.3)
+    sched = MinuteScheduler(offset=2.0, clock=clock, sleep=clock.sleep)
+    ticks = collect(sched, clock, [5.0, 30.0, 1.0])
+    assert [t.scheduled % 60 for t in ticks] == [2.0] * 4
+    assert [t.scheduled for t in ticks[1:]] == [t.scheduled + 60 for t in ticks[:-1]]
+    assert all(t.lateness == 0 for t in ticks)
+
+
+def test_overrun_skips_missed_ticks():
+    clock = FakeClock(1_000_020.0)
+    sched = MinuteScheduler(offset=0.0, max_late=5.0, clock=clock, sleep=clock.sleep)
+    ticks = collect(sched, clock, [150.0])
+    assert ticks[1].skipped == 2
+    assert ticks[1].scheduled == ticks[0].scheduled + 180
+    assert sched.stats()["skipped"] == 2
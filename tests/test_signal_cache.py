@@ -0,0 +1,126 @@
+import inspect
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtests.barframe import BarFrame
+from backtests.core import PortfolioSimulator
+from backtests.panel import Panel
+from backtests import signal_cache
+from backtests.signal_cache import SignalCache
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+
+class CountingBreakout(VolBreakout):
+    calls = 0
+
+    def generate_signals(self, df):
+        CountingBreakout.calls += 1
+        return super().generate_signals(df)
+
+
+def test_hit_restores_signals_and_indicators(make_frame, tmp_path):
+    cache = SignalCache(str(tmp_path))
+    df = make_frame(2000, 3, '2024-03-01')
+    strat = CountingBreakout(lookback=10)
+    expected = strat.simulate(df.copy())
+    CountingBreakout.calls = 0
+
+    for data in (df.copy(), df.copy()):
+        trades, equity = strat.simulate(data, cache.signals(strat, 'BTCUSDT', data))
+        pd.testing.assert_frame_equal(trades, expected[0])
+        pd.testing.assert_series_equal(equity, expected[1])
+    assert CountingBreakout.calls == 1
+
+    bars = BarFrame.from_frame(df)
+    first = cache.signals(FundingCarry(), 'BTCUSDT', bars)
+    bars = BarFrame.from_frame(df)
+    second = cache.signals(FundingCarry(), 'BTCUSDT', bars)
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+    assert 'predicted_funding' in bars
+
+
+def test_key_depends_on_params_symbol_and_data(make_frame, tmp_path):
+    cache = SignalCache(str(tmp_path))
+    df = make_frame(200, 3, '2024-03-01')
+    base = cache.key(VolBreakout(lookback=10), 'BTCUSDT', df)
+    assert cache.key(VolBreakout(lookback=10), 'BTCUSDT', df.copy()) == base
+    assert cache.key(VolBreakout(lookback=11), 'BTCUSDT', df) != base
+    assert cache.key(VolBreakout(lookback=10), 'ETHUSDT', df) != base
+    changed = df.copy()
+    changed.iloc[5, 3] += 1
+    assert cache.key(VolBreakout(lookback=10), 'BTCUSDT', changed) != base
+    derived = df.copy()
+    derived['range'] = 1.0
+    assert cache.key(VolBreakout(lookback=10), 'BTCUSDT', derived) == base
+
+
+def test_key_depends_on_code_version(make_frame, tmp_path, monkeypatch):
+    cache = SignalCache(str(tmp_path))
+    df = make_frame(200, 3, '2024-03-01')
+    base = cache.key(VolBreakout(), 'BTCUSDT', df)
+    monkeypatch.setattr(VolBreakout, 'CACHE_VERSION', 2)
+    assert cache.key(VolBreakout(), 'BTCUSDT', df) != base
+    monkeypatch.undo()
+
+    getsource = inspect.getsource
+
+    def edited(obj):
+        src = getsource(obj)
+        return src + '\n# edited\n' if obj.__name__ == VolBreakout.__module__ else src
+
+    monkeypatch.setattr(signal_cache.inspect, 'getsource', edited)
+    signal_cache.code_version.cache_clear()
+    try:
+        assert cache.key(VolBreakout(), 'BTCUSDT', df) != base
+    finally:
+        signal_cache.code_version.cache_clear()
+
+
+def test_key_covers_cache_modules(make_frame, tmp_path, monkeypatch):
+    cache = SignalCache(str(tmp_path))
+    df = make_frame(200, 3, '2024-03-01')
+    signal_cache.code_version.cache_clear()
+    base = cache.key(FundingCarry(), 'BTCUSDT', df)
+    getsource = inspect.getsource
+    monkeypatch.setattr(
+        signal_cache.inspect, 'getsource',
+        lambda obj: getsource(obj) + ('\n# edited\n' if obj.__name__ == 'utils.funding' else ''),
+    )
+    signal_cache.code_version.cache_clear()
+    try:
+        assert cache.key(FundingCarry(), 'BTCUSDT', df) != base
+    finally:
+        signal_cache.code_version.cache_clear()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = SignalCache(str(tmp_path), max_bytes=700)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, {'signal': np.zeros(100, dtype=np.int8)})
+        os.utime(tmp_path / key, (i, i))
+    cache.get('a')
+    cache.put('d', {'signal': np.zeros(100, dtype=np.int8)})
+    assert sorted(os.listdir(tmp_path)) == ['a', 'c', 'd']
+
+
+def test_default_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv('SIGNAL_CACHE_DIR', raising=False)
+    assert signal_cache.default_cache() is None
+    monkeypatch.setenv('SIGNAL_CACHE_DIR', str(tmp_path / 'signals'))
+    assert signal_cache.default_cache().directory == str(tmp_path / 'signals')
+
+
+def test_panel_signals_are_cached(make_frame, tmp_path):
+    cache = SignalCache(str(tmp_path))
+    frames = {'BTCUSDT': make_frame(500, 1, '2024-03-01'), 'ETHUSDT': make_frame(400, 2, '2024-03-01')}
+    items = [('vb', VolBreakout(lookback=10)), ('fc', FundingCarry())]
+    plain = PortfolioSimulator.from_panel(items, Panel.from_frames(frames)).run()
+    PortfolioSimulator.from_panel(items, Panel.from_frames(frames), cache=cache)
+    cached = PortfolioSimulator.from_panel(items, Panel.from_frames(frames), cache=cache).run()
+    pd.testing.assert_frame_equal(plain[0], cached[0])
+    pd.testing.assert_series_equal(plain[1], cached[1])
+    assert len(os.listdir(tmp_path)) == 2
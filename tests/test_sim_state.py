@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtests.barframe import BarFrame
+from backtests.core import SimState
+from backtests.run_backtest import extend_backtest
+from strategies.funding_carry import FundingCarry
+from strategies.vol_breakout import VolBreakout
+
+
+@pytest.mark.parametrize('make_strat', [lambda: VolBreakout(lookback=10), FundingCarry])
+def test_resumed_run_matches_full_run(make_frame, tmp_path, make_strat):
+    df = make_frame(4000, 11, '2024-04-01')
+    full_trades, full_equity = make_strat().simulate(df.copy())
+
+    state = None
+    trades, equity = [], []
+    for part in np.array_split(np.arange(len(df)), [1000, 1001, 2500]):
+        strat = make_strat()  # a fresh process each day
+        t, e, state = strat.simulate_from(df.iloc[part].copy(), state)
+        state.save(tmp_path / 'state.pkl')
+        state = SimState.load(tmp_path / 'state.pkl')
+        trades.append(t)
+        equity.append(e)
+
+    pd.testing.assert_frame_equal(pd.concat(trades, ignore_index=True), full_trades, check_exact=True)
+    pd.testing.assert_series_equal(pd.concat(equity), full_equity, check_exact=True)
+
+
+def test_resume_with_barframe_and_open_position(make_frame):
+    df = make_frame(4000, 11, '2024-04-01')
+    strat = VolBreakout(lookback=10)
+    full_trades, full_equity = strat.simulate(BarFrame.from_frame(df))
+    # split inside a trade so the open position crosses the boundary
+    cut = int(df.index.get_indexer([full_trades.entry_time.iloc[5]])[0]) + 1
+    _, first, state = strat.simulate_from(BarFrame.from_frame(df.iloc[:cut]))
+    assert state.position != 0 and state.held == 1
+    trades, second, _ = strat.simulate_from(BarFrame.from_frame(df.iloc[cut:]), state)
+    np.testing.assert_array_equal(
+        np.concatenate([first['equity'], second['equity']]), full_equity['equity']
+    )
+    pd.testing.assert_frame_equal(trades, full_trades.iloc[5:].reset_index(drop=True))
+
+
+def test_resume_rejects_other_params_and_overlap(make_frame):
+    df = make_frame(200, 11, '2024-04-01')
+    _, _, state = VolBreakout(lookback=10).simulate_from(df.iloc[:100].copy())
+    with pytest.raises(ValueError):
+        VolBreakout(lookback=20).simulate_from(df.iloc[100:].copy(), state)
+    with pytest.raises(ValueError):
+        VolBreakout(lookback=10).simulate_from(df.iloc[99:].copy(), state)
+
+
+def test_extend_backtest_appends_daily(make_frame, tmp_path):
+    df = make_frame(3 * 1440, 11, '2024-04-01')
+    full_trades, full_equity = VolBreakout(lookback=10).simulate(BarFrame.from_frame(df))
+    for day in range(3):
+        bars = BarFrame.from_frame(df.iloc[day * 1440:(day + 1) * 1440])
+        trades, equity = extend_backtest(VolBreakout(lookback=10), bars, str(tmp_path))
+    np.testing.assert_array_equal(equity.to_numpy(), full_equity['equity'])
+    np.testing.assert_array_equal(trades.pnl.to_numpy(), full_trades.pnl.to_numpy())
+    assert (trades.entry_time == full_trades.entry_time).all()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from strategies.vol_breakout import VolBreakout, DEFAULT_RISK_MULT
 
@@ -34,3 +35,25 @@ def test_generate_signals_close_only():
     strat = VolBreakout(lookback=15)
     signals = strat.generate_signals(df)
     assert isinstance(signals, pd.Series)
+
+
+def test_on_bar_matches_generate_signals():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-02-01', periods=500, freq='1min')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    df = pd.DataFrame({
+        'open': close,
+        'high': close * (1 + rng.uniform(0, 0.002, len(index))),
+        'low': close * (1 - rng.uniform(0, 0.002, len(index))),
+        'close': close,
+    }, index=index)
+    strat = VolBreakout(lookback=20)
+    expected = strat.generate_signals(df)
+    strat.reset()
+    cols = ['open', 'high', 'low', 'close']
+    got = [
+        strat.on_bar(int(ts.timestamp() * 1000), dict(zip(cols, row)))
+        for ts, row in zip(df.index, df[cols].to_numpy())
+    ]
+    assert (expected != 0).any()
+    assert got == expected.tolist()
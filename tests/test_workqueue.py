@@ -0,0 +1,85 @@
+import time
+from multiprocessing import Process
+
+import pytest
+
+from utils.workqueue import WorkQueue, run_worker
+
+
+def square(payload):
+    time.sleep(0.01)
+    return {"x": payload["x"], "y": payload["x"] ** 2}
+
+
+def test_local_workers_drain_queue(tmp_path):
+    path = str(tmp_path / "grid.db")
+    queue = WorkQueue(path)
+    queue.put_many([{"x": i} for i in range(40)])
+    procs = [Process(target=run_worker, args=(path, square, 30.0, 0.05)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert queue.counts() == {"done": 40}
+    assert sorted(r["y"] for r in queue.results()) == [i * i for i in range(40)]
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    path = str(tmp_path / "grid.db")
+    queue = WorkQueue(path, lease_seconds=0.05)
+    queue.put_many([{"x": 3}])
+    job_id, _ = queue.lease("dead-worker")
+    assert queue.lease("other") is None
+    time.sleep(0.1)
+    assert queue.lease("other") == (job_id, {"x": 3})
+    assert not queue.complete(job_id, "dead-worker", {"y": 0})
+    assert queue.complete(job_id, "other", {"y": 9})
+    assert queue.results() == [{"y": 9}]
+
+
+def test_lease_that_keeps_expiring_gives_up(tmp_path):
+    queue = WorkQueue(str(tmp_path / "grid.db"), lease_seconds=0.05, max_attempts=2)
+    queue.put_many([{"x": 1}])
+    for _ in range(2):
+        assert queue.lease("crashing-worker") is not None
+        time.sleep(0.1)
+    assert queue.lease("other") is None
+    assert queue.counts() == {"failed": 1}
+    assert queue.unfinished() == 0
+
+
+def test_worker_waits_for_seed(tmp_path):
+    path = str(tmp_path / "grid.db")
+    queue = WorkQueue(path)
+    worker = Process(target=run_worker, args=(path, square, 30.0, 0.05))
+    worker.start()
+    time.sleep(0.5)
+    assert worker.is_alive()
+    queue.seed([{"x": i} for i in range(5)], "grid-a")
+    worker.join(timeout=60)
+    assert queue.counts() == {"done": 5}
+
+
+def test_failed_job_retries_then_gives_up(tmp_path):
+    queue = WorkQueue(str(tmp_path / "grid.db"))
+    queue.put_many([{"x": 1}])
+    for _ in range(3):
+        job_id, _ = queue.lease("w")
+        queue.fail(job_id, "w", "boom", max_attempts=3)
+    assert queue.counts() == {"failed": 1}
+
+
+def test_seed_resumes_same_jobs_and_refuses_others(tmp_path):
+    path = str(tmp_path / "grid.db")
+    queue = WorkQueue(path)
+    assert queue.seed([{"x": 1}, {"x": 2}], "grid-a")
+    job_id, _ = queue.lease("w")
+    queue.complete(job_id, "w", {"y": 1})
+    queue.close()
+
+    queue = WorkQueue(path)
+    assert not queue.seed([{"x": 1}, {"x": 2}], "grid-a")
+    assert queue.counts() == {"done": 1, "pending": 1}
+    with pytest.raises(ValueError):
+        queue.seed([{"x": 3}], "grid-b")
+    assert queue.counts() == {"done": 1, "pending": 1}
@@ -81,3 +81,62 @@ def fetch_funding(symbol: str, net: str = "testnet") -> float:
     resp.raise_for_status()
     data = resp.json()
     return float(data["result"]["list"][0]["fundingRate"])
+
+
+def get_kline(
+    symbol: str,
+    start: int,
+    end: int,
+    net: str = "testnet",
+    kind: str = "mark",
+    limit: int = 1000,
+) -> list:
+    """Return 1m ``[startTime, open, high, low, close]`` rows, oldest first.
+
+    ``kind`` selects the ``mark`` or ``index`` price kline and ``start`` /
+    ``end`` are epoch milliseconds. At most ``limit`` rows are returned.
+    """
+    if kind not in ("mark", "index"):
+        raise ValueError("kind must be 'mark' or 'index'")
+    url = base_url(net) + f"/v5/market/{kind}-price-kline"
+    params = {
+        "category": "linear",
+        "symbol": symbol,
+        "interval": 1,
+        "start": start,
+        "end": end,
+        "limit": limit,
+    }
+    resp = requests.get(url, params=params, timeout=10)
+    resp.raise_for_status()
+    rows = resp.json()["result"]["list"] or []
+    return sorted(([int(r[0]), *map(float, r[1:5])] for r in rows), key=lambda r: r[0])
+
+
+def place_batch_order_post_only(
+    orders: list[dict],
+    key: str,
+    secret: str,
+    net: str = "testnet",
+):
+    """Place several post-only limit orders with one ``create-batch`` call.
+
+    Each order is a dict with ``symbol``, ``side``, ``qty`` and ``price``.
+    """
+    url = base_url(net) + "/v5/order/create-batch"
+    request = [
+        {
+            "symbol": o["symbol"],
+            "side": o["side"],
+            "orderType": "Limit",
+            "qty": o["qty"],
+            "price": o["price"],
+            "timeInForce": "PostOnly",
+        }
+        for o in orders
+    ]
+    params = {"category": "linear", "request": request}
+    payload = _auth_params(key, secret, params)
+    resp = requests.post(url, json=payload, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
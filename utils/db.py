@@ -1,4 +1,8 @@
 import os
+import queue
+import threading
+from contextlib import contextmanager
+
 import pymysql
 
 def db_conn():
@@ -10,3 +14,100 @@ def db_conn():
         port=int(os.getenv("DB_PORT", 3306)),
         autocommit=False,
     )
+
+
+class ConnectionPool:
+    """Thread-safe pool of at most ``max_size`` reusable connections.
+
+    Connections are pinged on checkout and transparently reconnected or
+    replaced if the server dropped them, and rolled back on return so the
+    next user starts with a clean transaction.
+    """
+
+    def __init__(self, max_size: int = 4, connect=db_conn, timeout: float = 30.0):
+        self.max_size = max_size
+        self.connect = connect
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.max_size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self.connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(
+                    f"No database connection free after {self.timeout}s "
+                    f"(pool size {self.max_size})"
+                ) from None
+        try:
+            conn.ping(reconnect=True)
+        except Exception:
+            self._discard(conn)
+            return self.acquire()
+        return conn
+
+    def release(self, conn) -> None:
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pools: dict[int, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return this process's pool; forked workers get a pool of their own."""
+    pid = os.getpid()
+    with _pools_lock:
+        if pid not in _pools:
+            _pools[pid] = ConnectionPool(int(os.getenv("DB_POOL_SIZE", 4)))
+        return _pools[pid]
+
+
+@contextmanager
+def pooled_conn():
+    """Borrow a connection from the process pool for the ``with`` block."""
+    with get_pool().connection() as conn:
+        yield conn
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from utils import bybit
+
+MAX_BATCH = 10  # Bybit create-batch limit for linear contracts
+
+
+@dataclass
+class Order:
+    symbol: str
+    side: str
+    qty: float
+    price: float
+    strategy: str
+    ts: datetime
+    signal_time: float = field(default_factory=time.monotonic)
+    order_id: str | None = None
+    fee: float = 0.0
+    realised_pnl: float = 0.0
+    error: str | None = None
+    latency: float | None = None  # seconds from signal to exchange ack
+
+
+class OrderExecutor:
+    """Send orders from a bounded queue using a pool of worker tasks.
+
+    Exchange calls run in threads so the event loop never blocks on them.
+    With ``batch_size > 1`` a worker drains up to that many queued orders
+    and sends them through ``/v5/order/create-batch`` in a single request.
+    ``on_ack`` runs as its own task for every order once its outcome is
+    known, so a slow handler never holds up the workers; :meth:`drain`
+    waits for it.
+    ``exchange`` defaults to :mod:`utils.bybit`.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        secret: str,
+        net: str = "testnet",
+        workers: int = 4,
+        max_queue: int = 100,
+        batch_size: int = 1,
+        on_ack=None,
+        history: int = 1000,
+        exchange=None,
+    ):
+        if not 1 <= batch_size <= MAX_BATCH:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH}")
+        self.key = key
+        self.secret = secret
+        self.net = net
+        self.workers = workers
+        self.batch_size = batch_size
+        self.on_ack = on_ack
+        self.exchange = exchange or bybit
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.completed: deque[Order] = deque(maxlen=history)
+        self._tasks: list[asyncio.Task] = []
+        self._acks: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def submit(self, order: Order) -> None:
+        """Queue an order, waiting if the queue is full."""
+        await self.queue.put(order)
+
+    async def drain(self) -> None:
+        """Wait until every queued order has been acknowledged and handled."""
+        await self.queue.join()
+        while self._acks:
+            await asyncio.gather(*self._acks, return_exceptions=True)
+
+    async def stop(self) -> None:
+        await self.drain()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def latency_stats(self) -> dict:
+        """Return count, mean and max signal-to-ack latency in milliseconds."""
+        lat = [o.latency for o in self.completed if o.latency is not None]
+        if not lat:
+            return {"count": 0, "mean_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": len(lat),
+            "mean_ms": 1000 * sum(lat) / len(lat),
+            "max_ms": 1000 * max(lat),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._send(batch)
+            except Exception as exc:
+                print(f"[WARN] Order worker error: {exc}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _send(self, batch: list[Order]) -> None:
+        try:
+            if len(batch) == 1:
+                o = batch[0]
+                resp = await asyncio.to_thread(
+                    self.exchange.place_order_post_only,
+                    o.symbol,
+                    o.side,
+                    o.qty,
+                    o.price,
+                    self.key,
+                    self.secret,
+                    self.net,
+                )
+                self._apply(o, resp, resp.get("result") or {})
+            else:
+                resp = await asyncio.to_thread(
+                    self.exchange.place_batch_order_post_only,
+                    [vars(o) for o in batch],
+                    self.key,
+                    self.secret,
+                    self.net,
+                )
+                results = (resp.get("result") or {}).get("list") or []
+                infos = (resp.get("retExtInfo") or {}).get("list") or []
+                for i, o in enumerate(batch):
+                    info = infos[i] if i < len(infos) else {}
+                    result = results[i] if i < len(results) else {}
+                    self._apply(o, info or resp, result)
+        except Exception as exc:
+            for o in batch:
+                o.error = str(exc)
+        acked = time.monotonic()
+        for o in batch:
+            if o.error is None:
+                o.latency = acked - o.signal_time
+            self.completed.append(o)
+            if self.on_ack is not None:
+                task = asyncio.create_task(self.on_ack(o))
+                self._acks.add(task)
+                task.add_done_callback(self._ack_done)
+
+    def _ack_done(self, task: asyncio.Task) -> None:
+        self._acks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[WARN] Order ack handler error: {task.exception()}")
+
+    @staticmethod
+    def _apply(order: Order, status: dict, result: dict) -> None:
+        code = status.get("retCode", status.get("code", 0))
+        if code:
+            order.error = status.get("retMsg") or status.get("msg") or f"retCode {code}"
+        else:
+            order.order_id = result.get("orderId")
+            # only reported by simulated exchanges; Bybit acks omit them
+            order.fee = float(result.get("cumExecFee") or 0.0)
+            order.realised_pnl = float(result.get("realisedPnl") or 0.0)
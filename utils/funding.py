@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+SETTLEMENT_MS = 8 * 60 * 60 * 1000
+
 
 def minutes_to_settlement(ts_ms: int) -> int:
     """Return minutes until the next 8h funding settlement."""
@@ -8,7 +11,118 @@ def minutes_to_settlement(ts_ms: int) -> int:
     return int((next_settlement - ts).total_seconds() // 60)
 
 
+def minutes_to_settlement_array(ts_ms: np.ndarray) -> np.ndarray:
+    """Vectorized :func:`minutes_to_settlement` for int64 epoch milliseconds."""
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    return ((ts_ms // SETTLEMENT_MS + 1) * SETTLEMENT_MS - ts_ms) // 60_000
+
+
 def predicted_funding(mark_df: pd.DataFrame, index_df: pd.DataFrame) -> pd.Series:
     """Calculate predicted funding rate from mark and index price series."""
     premium = (mark_df["close"] - index_df["close"]) / index_df["close"]
     return premium.clip(-0.0075, 0.0075)
+
+
+# Bybit funding: F = clamp(P + clamp(I - P, -0.05%, 0.05%), -cap, cap), where P
+# is the average premium index over the 8h interval, each minute weighted by
+# its position in the interval (1, 2, ..., 480)
+INTEREST_RATE = 0.0001
+PREMIUM_CLAMP = 0.0005
+FUNDING_CAP = 0.0075
+SLOTS = SETTLEMENT_MS // 60_000
+
+
+def funding_from_premium(premium):
+    """Funding rate implied by an average premium (array or scalar)."""
+    rate = premium + np.clip(INTEREST_RATE - premium, -PREMIUM_CLAMP, PREMIUM_CLAMP)
+    return np.clip(rate, -FUNDING_CAP, FUNDING_CAP)
+
+
+def time_weighted_premium(ts_ms: np.ndarray, premium: np.ndarray) -> np.ndarray:
+    """Running time-weighted premium within each 8h settlement window.
+
+    ``ts_ms`` are sorted, unique 1m bar starts and ``premium`` has them on
+    its last axis (``(symbols, bars)`` panels work too). NaN premiums are
+    skipped. The per-window sums are cumulative sums over a
+    ``(windows, minutes)`` grid, so no running total crosses a settlement
+    and the result equals :class:`FundingEstimator` bit for bit.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    premium = np.asarray(premium, dtype=np.float64)
+    out = np.full(premium.shape, np.nan)
+    if not len(ts_ms):
+        return out
+    window = ts_ms // SETTLEMENT_MS
+    slot = (ts_ms - window * SETTLEMENT_MS) // 60_000
+    row = window - window[0]
+    valid = ~np.isnan(premium)
+    weight = np.where(valid, slot + 1, 0)
+    lead = premium.shape[:-1]
+    num = np.zeros(lead + (int(row[-1]) + 1, SLOTS))
+    den = np.zeros(lead + (int(row[-1]) + 1, SLOTS))
+    num[..., row, slot] = np.where(valid, premium * (slot + 1), 0.0)
+    den[..., row, slot] = weight
+    num = np.cumsum(num, axis=-1)[..., row, slot]
+    den = np.cumsum(den, axis=-1)[..., row, slot]
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def predicted_funding_twap(ts_ms: np.ndarray, mark: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Predicted funding from the time-weighted mark/index premium."""
+    mark = np.asarray(mark, dtype=np.float64)
+    index = np.asarray(index, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        premium = (mark - index) / index
+    return funding_from_premium(time_weighted_premium(ts_ms, premium))
+
+
+def settlement_estimates(ts_ms: np.ndarray, mark: np.ndarray, index: np.ndarray) -> pd.Series:
+    """Predicted rate at the last bar of each complete window, by settlement time.
+
+    The index matches ``startTime`` in ``funding8h``, the settlement that
+    closes the window.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    rate = predicted_funding_twap(ts_ms, mark, index)
+    last = (ts_ms % SETTLEMENT_MS) // 60_000 == SLOTS - 1
+    settle = (ts_ms[last] // SETTLEMENT_MS + 1) * SETTLEMENT_MS
+    return pd.Series(rate[last], index=pd.to_datetime(settle, unit="ms"), name="estimated")
+
+
+def compare_to_settled(estimated: pd.Series, settled: pd.Series) -> pd.DataFrame:
+    """Line up estimates with settled ``funding8h`` rates by settlement time."""
+    df = pd.concat({"estimated": estimated, "settled": settled}, axis=1, join="inner")
+    df["error"] = df["estimated"] - df["settled"]
+    return df
+
+
+class FundingEstimator:
+    """Incremental :func:`time_weighted_premium` for live 1m bars.
+
+    ``update`` is O(1) and returns the predicted funding rate after the bar.
+    Bars before the first full settlement window only see part of it.
+    """
+
+    def __init__(self):
+        self.window = None
+        self.num = 0.0
+        self.den = 0
+        self.premium = float("nan")
+
+    def update(self, ts_ms: int, mark: float, index: float) -> float:
+        window = ts_ms // SETTLEMENT_MS
+        if window != self.window:
+            self.window = window
+            self.num = 0.0
+            self.den = 0
+            self.premium = float("nan")
+        premium = (mark - index) / index if index else float("nan")
+        if premium == premium:
+            weight = (ts_ms - window * SETTLEMENT_MS) // 60_000 + 1
+            self.num += premium * weight
+            self.den += weight
+            self.premium = self.num / self.den
+        p = self.premium
+        rate = p + min(max(INTEREST_RATE - p, -PREMIUM_CLAMP), PREMIUM_CLAMP)
+        return min(max(rate, -FUNDING_CAP), FUNDING_CAP)
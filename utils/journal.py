@@ -0,0 +1,225 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),  # epoch milliseconds
+        ("symbol", "S20"),
+        ("strategy", "S20"),
+        ("side", "S4"),
+        ("qty", "<f8"),
+        ("price", "<f8"),
+        ("fee", "<f8"),
+        ("funding", "<f8"),
+        ("realised_pnl", "<f8"),
+    ]
+)
+MAGIC = b"CSJ1"
+HEADER_SIZE = 16
+DAY_MS = 86_400_000
+
+
+def _header() -> bytes:
+    return MAGIC + RECORD_DTYPE.itemsize.to_bytes(4, "little") + bytes(HEADER_SIZE - 8)
+
+
+def segment_path(directory, day: int) -> Path:
+    """Return the segment file for ``day`` (days since the epoch, UTC)."""
+    date = pd.Timestamp(day * DAY_MS, unit="ms")
+    return Path(directory) / f"{date:%Y%m%d}.jsg"
+
+
+class Journal:
+    """Append-only trade journal written by a background thread.
+
+    Records are queued by :meth:`write` and appended in batches every
+    ``flush_interval`` seconds, with an ``fsync`` at most every
+    ``fsync_interval`` seconds. Each UTC day of record timestamps goes to
+    its own segment of fixed-size binary records, so files roll over at
+    midnight while the bot keeps running.
+
+    If the writer thread fails, e.g. on a full disk, it stops and the error
+    is raised from the next :meth:`write` and from :meth:`close`.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = "logs/journal",
+        flush_interval: float = 1.0,
+        fsync_interval: float = 5.0,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._files: dict[int, object] = {}
+        self._stop = threading.Event()
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def write(
+        self,
+        ts,
+        symbol: str,
+        strategy: str,
+        side: str,
+        qty: float,
+        price: float,
+        fee: float = 0.0,
+        funding: float = 0.0,
+        realised_pnl: float = 0.0,
+    ) -> None:
+        """Queue one record; ``ts`` is a datetime or epoch milliseconds.
+
+        Raises ``ValueError`` for text longer than its fixed-size field.
+        """
+        self._check()
+        if isinstance(ts, datetime):
+            ts = int(ts.timestamp() * 1000)
+        fields = {"symbol": symbol.encode(), "strategy": strategy.encode(), "side": side.encode()}
+        for name, value in fields.items():
+            if len(value) > RECORD_DTYPE[name].itemsize:
+                raise ValueError(
+                    f"{name} {value.decode()!r} is longer than {RECORD_DTYPE[name].itemsize} bytes"
+                )
+        self._queue.put(
+            (
+                int(ts),
+                fields["symbol"],
+                fields["strategy"],
+                fields["side"],
+                qty,
+                price,
+                fee,
+                funding,
+                realised_pnl,
+            )
+        )
+
+    def close(self) -> None:
+        """Flush everything queued, fsync and close all segments."""
+        self._stop.set()
+        self._thread.join()
+        self._check()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("journal writer failed") from self._error
+
+    def _run(self) -> None:
+        last_sync = time.monotonic()
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush()
+                if time.monotonic() - last_sync >= self.fsync_interval:
+                    self._sync()
+                    last_sync = time.monotonic()
+            self._flush()
+            self._sync()
+        except Exception as exc:
+            self._error = exc
+            print(f"[ERROR] Journal writer stopped: {exc!r}")
+        finally:
+            for f in self._files.values():
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            self._files = {}
+
+    def _flush(self) -> None:
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not rows:
+            return
+        records = np.array(rows, dtype=RECORD_DTYPE)
+        days = records["ts"] // DAY_MS
+        for day in np.unique(days):
+            f = self._segment(int(day))
+            f.write(records[days == day].tobytes())
+            f.flush()
+
+    def _sync(self) -> None:
+        for f in self._files.values():
+            os.fsync(f.fileno())
+
+    def _segment(self, day: int):
+        if day not in self._files:
+            for old in [d for d in self._files if d < day]:
+                f = self._files.pop(old)
+                os.fsync(f.fileno())
+                f.close()
+            f = open(segment_path(self.directory, day), "ab")
+            size = f.tell()
+            if size < HEADER_SIZE:
+                f.truncate(0)
+                f.write(_header())
+            else:
+                # drop a partial record left by a crash so new ones stay aligned
+                whole = size - (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+                if whole != size:
+                    f.truncate(whole)
+            self._files[day] = f
+        return self._files[day]
+
+
+def read_segment(path: str | Path) -> np.ndarray:
+    """Memory-map one segment as a structured array of ``RECORD_DTYPE``.
+
+    A trailing partial record, e.g. from a crash mid-write, is ignored.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:4] != MAGIC:
+        raise ValueError(f"{path} is not a journal segment")
+    if int.from_bytes(header[4:8], "little") != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has an incompatible record size")
+    n = (path.stat().st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+
+def load_journal(directory: str | Path, start, end) -> np.ndarray:
+    """Return all records with ``start <= ts <= end`` as one structured array."""
+    start_ms = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ms = int(pd.Timestamp(end).timestamp() * 1000)
+    parts = []
+    for day in range(start_ms // DAY_MS, end_ms // DAY_MS + 1):
+        path = segment_path(directory, day)
+        if path.exists():
+            rec = read_segment(path)
+            parts.append(rec[(rec["ts"] >= start_ms) & (rec["ts"] <= end_ms)])
+    if not parts:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.concatenate(parts)
+
+
+def read_journal(directory: str | Path, start, end) -> pd.DataFrame:
+    """Load a date range of journal records into a DataFrame.
+
+    Columns match the old CSV trade log, with ``timestamp`` as UTC datetimes.
+    """
+    rec = load_journal(directory, start, end)
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(rec["ts"], unit="ms", utc=True),
+            **{c: np.char.decode(rec[c]) for c in ("symbol", "strategy", "side")},
+            **{c: rec[c] for c in ("qty", "price", "fee", "funding", "realised_pnl")},
+        }
+    )
+    return df.sort_values("timestamp", kind="stable", ignore_index=True)
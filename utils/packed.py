@@ -0,0 +1,140 @@
+import os
+import struct
+from decimal import Decimal
+
+import numpy as np
+
+HOUR_MS = 3_600_000
+VERSION = 1
+# version, decimals (-1: raw float64), delta width in bytes, minute mask, base
+_HEADER = struct.Struct("<BbBQq")
+_MINUTES = np.arange(60, dtype=np.uint64)
+
+
+def enabled() -> bool:
+    """True when ``BAR_LAYOUT=packed`` selects the packed mark1/index1 tables."""
+    return os.getenv("BAR_LAYOUT", "rows") == "packed"
+
+
+def tick_decimals(tick_size: str) -> int:
+    """Decimal places of a tick size such as ``"0.10"`` (1) or ``"0.0001"`` (4)."""
+    return max(0, -Decimal(tick_size).normalize().as_tuple().exponent)
+
+
+def price_decimals(values: np.ndarray, start: int = 0, limit: int = 12) -> int:
+    """Fewest decimals, at least ``start``, that represent ``values`` exactly.
+
+    Returns -1 when no scale up to ``limit`` round-trips every value bit for
+    bit; such blocks are stored as raw float64.
+    """
+    for d in range(start, limit + 1):
+        scale = 10.0 ** d
+        with np.errstate(invalid="ignore", over="ignore"):
+            ints = np.round(values * scale)
+            if np.all(np.abs(ints) < 2 ** 53) and np.array_equal(ints / scale, values):
+                return d
+    return -1
+
+
+def encode_hour(hour_start: int, ts: np.ndarray, ohlc: np.ndarray, decimals: int = 0) -> bytes:
+    """Pack up to 60 minute bars of one hour.
+
+    ``ohlc`` is ``(bars, 4)``. Prices become integers in units of
+    ``10**-d`` (``d`` from :func:`price_decimals`, starting at the symbol's
+    tick decimals), stored as deltas from the first open in the narrowest
+    integer type that fits.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    ohlc = np.asarray(ohlc, dtype=np.float64).reshape(-1, 4)
+    slots = (ts - hour_start) // 60_000
+    if len(slots) and (slots.min() < 0 or slots.max() > 59):
+        raise ValueError("bars outside the hour")
+    order = np.argsort(slots, kind="stable")
+    slots, ohlc = slots[order], ohlc[order]
+    if len(np.unique(slots)) != len(slots):
+        raise ValueError("duplicate minute in hour")
+    mask = int(np.bitwise_or.reduce(np.left_shift(np.uint64(1), slots.astype(np.uint64)), initial=0))
+    d = price_decimals(ohlc, decimals)
+    if d < 0 or not len(ohlc):
+        return _HEADER.pack(VERSION, -1, 8, mask, 0) + ohlc.T.astype("<f8").tobytes()
+    ints = np.round(ohlc * 10.0 ** d).astype(np.int64)
+    base = int(ints[0, 0])
+    deltas = ints - base
+    lo, hi = int(deltas.min()), int(deltas.max())
+    width = next(w for w in (1, 2, 4, 8) if -(2 ** (8 * w - 1)) <= lo and hi < 2 ** (8 * w - 1))
+    return _HEADER.pack(VERSION, d, width, mask, base) + deltas.T.astype(f"<i{width}").tobytes()
+
+
+def decode_hour(hour_start: int, blob: bytes) -> tuple:
+    """Return ``(ts, ohlc)`` for a blob written by :func:`encode_hour`."""
+    version, d, width, mask, base = _HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"unknown packed bar version {version}")
+    slots = np.nonzero((np.uint64(mask) >> _MINUTES) & np.uint64(1))[0]
+    n = len(slots)
+    ts = hour_start + slots.astype(np.int64) * 60_000
+    if d < 0:
+        cols = np.frombuffer(blob, dtype="<f8", count=4 * n, offset=_HEADER.size)
+        return ts, cols.reshape(4, n).T.astype(np.float64)
+    deltas = np.frombuffer(blob, dtype=f"<i{width}", count=4 * n, offset=_HEADER.size)
+    ints = deltas.reshape(4, n).T.astype(np.int64) + base
+    # exact ints divided by an exact power of ten: correctly rounded, so
+    # the same double the decimal string parsed to
+    return ts, ints / 10.0 ** d
+
+
+def load_packed(conn, table: str, symbol: str, start_ts: int, end_ts: int) -> tuple:
+    """Decode ``{table}_packed`` bars with ``start_ts <= startTime <= end_ts``."""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT hourStart, bars FROM {table}_packed "
+            "WHERE symbol=%s AND hourStart BETWEEN %s AND %s ORDER BY hourStart",
+            (symbol, start_ts // HOUR_MS * HOUR_MS, end_ts),
+        )
+        rows = cur.fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 4))
+    parts = [decode_hour(int(h), bytes(b)) for h, b in rows]
+    ts = np.concatenate([p[0] for p in parts])
+    ohlc = np.concatenate([p[1] for p in parts])
+    keep = (ts >= start_ts) & (ts <= end_ts)
+    return ts[keep], ohlc[keep]
+
+
+def write_packed(conn, table: str, symbol: str, ts: np.ndarray, ohlc: np.ndarray,
+                 decimals: int = 0) -> None:
+    """Merge bars into ``{table}_packed``; new bars replace stored minutes."""
+    ts = np.asarray(ts, dtype=np.int64)
+    ohlc = np.asarray(ohlc, dtype=np.float64).reshape(-1, 4)
+    if not len(ts):
+        return
+    # overlapping API pages can repeat a bar; the last copy wins
+    _, last = np.unique(ts[::-1], return_index=True)
+    keep = len(ts) - 1 - last
+    ts, ohlc = ts[keep], ohlc[keep]
+    hours = ts // HOUR_MS * HOUR_MS
+    existing = {}
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT hourStart, bars FROM {table}_packed "
+            "WHERE symbol=%s AND hourStart BETWEEN %s AND %s",
+            (symbol, int(hours.min()), int(hours.max())),
+        )
+        for h, b in cur.fetchall():
+            existing[int(h)] = decode_hour(int(h), bytes(b))
+        values = []
+        for hour in np.unique(hours).tolist():
+            sel = hours == hour
+            new_ts, new_ohlc = ts[sel], ohlc[sel]
+            if hour in existing:
+                old_ts, old_ohlc = existing[hour]
+                keep = ~np.isin(old_ts, new_ts)
+                new_ts = np.concatenate([old_ts[keep], new_ts])
+                new_ohlc = np.concatenate([old_ohlc[keep], new_ohlc])
+            values.append((symbol, hour, encode_hour(hour, new_ts, new_ohlc, decimals)))
+        cur.executemany(
+            f"INSERT INTO {table}_packed (symbol, hourStart, bars) VALUES (%s,%s,%s) "
+            "ON DUPLICATE KEY UPDATE bars=VALUES(bars)",
+            values,
+        )
+    conn.commit()
@@ -0,0 +1,84 @@
+from collections import deque
+import math
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size NumPy buffer holding the most recent ``size`` values."""
+
+    def __init__(self, size: int, dtype=float):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self.size = size
+        self.data = np.full(size, np.nan, dtype=dtype)
+        self.count = 0  # total number of values ever appended
+
+    def append(self, value) -> None:
+        self.data[self.count % self.size] = value
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def __getitem__(self, i: int):
+        """Return a value by position, ``0`` oldest and ``-1`` newest."""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("ring buffer index out of range")
+        return self.data[(self.count - n + i) % self.size]
+
+    def values(self) -> np.ndarray:
+        """Return the buffered values ordered oldest to newest."""
+        if self.count < self.size:
+            return self.data[: self.count].copy()
+        i = self.count % self.size
+        return np.concatenate((self.data[i:], self.data[:i]))
+
+
+class RollingExtreme:
+    """Rolling max or min over the last ``window`` values.
+
+    Uses a monotonic deque of positions into a :class:`RingBuffer`, so each
+    update is O(1) amortised regardless of ``window``. Like
+    ``Series.rolling(window).max()`` the value is NaN until ``window`` values
+    have been seen or while a NaN is inside the window.
+    """
+
+    def __init__(self, window: int, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError("mode must be 'max' or 'min'")
+        self.window = window
+        self.mode = mode
+        self.buf = RingBuffer(window)
+        self._idx: deque[int] = deque()
+        self._last_nan = -1 - window
+
+    def _dominates(self, a: float, b: float) -> bool:
+        return a >= b if self.mode == "max" else a <= b
+
+    def append(self, value: float) -> None:
+        i = self.buf.count
+        if self._idx and self._idx[0] <= i - self.window:
+            self._idx.popleft()
+        if math.isnan(value):
+            self._last_nan = i
+        else:
+            data = self.buf.data
+            while self._idx and self._dominates(value, data[self._idx[-1] % self.window]):
+                self._idx.pop()
+            self._idx.append(i)
+        self.buf.append(value)
+
+    @property
+    def value(self) -> float:
+        i = self.buf.count
+        if not self.buf.full or self._last_nan > i - 1 - self.window or not self._idx:
+            return math.nan
+        return float(self.buf.data[self._idx[0] % self.window])
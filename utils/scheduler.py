@@ -0,0 +1,84 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class Tick:
+    scheduled: float  # epoch seconds the tick was due
+    fired: float  # epoch seconds the tick actually fired
+    skipped: int  # ticks dropped since the previous one
+
+    @property
+    def lateness(self) -> float:
+        return self.fired - self.scheduled
+
+
+class MinuteScheduler:
+    """Fire at ``offset`` seconds after every ``period`` wall-clock boundary.
+
+    Targets are computed from the boundary grid rather than by sleeping a
+    fixed interval, so the time spent handling a tick never accumulates as
+    drift. If a tick would fire more than ``max_late`` seconds after its
+    boundary it is skipped instead of being run late. ``clock`` and
+    ``sleep`` can be replaced, e.g. with a simulated clock.
+    """
+
+    def __init__(
+        self,
+        offset: float = 2.0,
+        period: float = 60.0,
+        max_late: float = 10.0,
+        clock=time.time,
+        sleep=asyncio.sleep,
+        history: int = 1000,
+    ):
+        if not 0 <= offset < period:
+            raise ValueError("offset must be in [0, period)")
+        self.offset = offset
+        self.period = period
+        self.max_late = max_late
+        self.clock = clock
+        self.sleep = sleep
+        self.fired = 0
+        self.skipped = 0
+        self.lateness: deque[float] = deque(maxlen=history)
+
+    def next_boundary(self, now: float) -> float:
+        """Return the first scheduled time strictly after ``now``."""
+        k = math.floor((now - self.offset) / self.period) + 1
+        return k * self.period + self.offset
+
+    async def ticks(self):
+        """Yield a :class:`Tick` for every scheduled time, forever."""
+        target = self.next_boundary(self.clock())
+        skipped = 0
+        while True:
+            delay = target - self.clock()
+            if delay > 0:
+                await self.sleep(delay)
+            now = self.clock()
+            if now - target > self.max_late:
+                missed = max(1, math.ceil((now - target - self.max_late) / self.period))
+                skipped += missed
+                self.skipped += missed
+                target += missed * self.period
+                continue
+            tick = Tick(target, now, skipped)
+            self.fired += 1
+            self.lateness.append(tick.lateness)
+            skipped = 0
+            yield tick
+            target += self.period
+
+    def stats(self) -> dict:
+        """Return fired/skipped counts and lateness in milliseconds."""
+        lat = list(self.lateness)
+        return {
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "mean_late_ms": 1000 * sum(lat) / len(lat) if lat else 0.0,
+            "max_late_ms": 1000 * max(lat) if lat else 0.0,
+        }
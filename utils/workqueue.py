@@ -0,0 +1,198 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+
+class WorkQueue:
+    """Durable job queue in a SQLite file shared by a coordinator and workers.
+
+    Workers lease one job at a time. A lease lasts ``lease_seconds`` unless
+    renewed with :meth:`heartbeat`; leases that expire (e.g. a worker died)
+    go back to ``pending`` and are handed out again, until a job has been
+    leased ``max_attempts`` times and is marked ``failed``. For workers on several
+    hosts the file must live on storage all of them can lock. The queue uses
+    SQLite's rollback journal rather than WAL, which needs shared memory
+    and so does not work across network filesystems such as NFS or SMB.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT
+            )"""
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def put_many(self, payloads) -> int:
+        """Queue JSON-serialisable payloads; returns how many were added."""
+        rows = [(json.dumps(p),) for p in payloads]
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("INSERT INTO jobs (payload) VALUES (?)", rows)
+        return len(rows)
+
+    def seed(self, payloads, tag: str) -> bool:
+        """Fill an empty queue with ``payloads`` labelled ``tag``.
+
+        Returns ``False`` when the queue already holds the jobs of ``tag``,
+        e.g. when a coordinator is restarted, and raises ``ValueError`` when
+        it holds anything else.
+        """
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT value FROM meta WHERE key='tag'").fetchone()
+            if row is not None and row[0] == tag:
+                return False
+            if row is not None or self.conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone():
+                raise ValueError(f"{self.path} already holds a different set of jobs")
+            self.conn.executemany(
+                "INSERT INTO jobs (payload) VALUES (?)", [(json.dumps(p),) for p in payloads]
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('tag', ?)", (tag,))
+        return True
+
+    def lease(self, worker: str):
+        """Claim the next pending job as ``(job_id, payload)``, or ``None``."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            # a job whose worker keeps dying must not be retried forever
+            self.conn.execute(
+                "UPDATE jobs SET worker=NULL, lease_until=NULL, "
+                "status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error=CASE WHEN attempts >= ? THEN 'lease expired' ELSE error END "
+                "WHERE status='leased' AND lease_until < ?",
+                (self.max_attempts, self.max_attempts, now),
+            )
+            row = self.conn.execute(
+                "SELECT id, payload FROM jobs WHERE status='pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status='leased', worker=?, lease_until=?, "
+                "attempts=attempts+1 WHERE id=?",
+                (worker, now + self.lease_seconds, row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend a lease; ``False`` if the job is no longer ours."""
+        cur = self.conn.execute(
+            "UPDATE jobs SET lease_until=? WHERE id=? AND worker=? AND status='leased'",
+            (time.time() + self.lease_seconds, job_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result) -> bool:
+        cur = self.conn.execute(
+            "UPDATE jobs SET status='done', result=?, lease_until=NULL "
+            "WHERE id=? AND worker=? AND status='leased'",
+            (json.dumps(result), job_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, max_attempts: int = None) -> None:
+        """Record an error, re-queueing the job until ``max_attempts`` is hit."""
+        if max_attempts is None:
+            max_attempts = self.max_attempts
+        self.conn.execute(
+            "UPDATE jobs SET error=?, lease_until=NULL, worker=NULL, "
+            "status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE id=? AND worker=? AND status='leased'",
+            (error, max_attempts, job_id, worker),
+        )
+
+    def counts(self) -> dict:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return dict(rows.fetchall())
+
+    def seeded(self) -> bool:
+        """Whether any jobs have been queued yet."""
+        return bool(
+            self.conn.execute("SELECT 1 FROM meta WHERE key='tag'").fetchone()
+            or self.conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone()
+        )
+
+    def unfinished(self) -> int:
+        """Jobs still pending or leased."""
+        c = self.counts()
+        return c.get("pending", 0) + c.get("leased", 0)
+
+    def results(self) -> list:
+        rows = self.conn.execute("SELECT result FROM jobs WHERE status='done' ORDER BY id")
+        return [json.loads(r[0]) for r in rows]
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(path: str, func, lease_seconds: float = 300.0, poll: float = 2.0) -> int:
+    """Lease and run jobs with ``func(payload)`` until the queue is drained.
+
+    A worker started before the coordinator has seeded the queue waits for
+    the jobs to appear instead of exiting at once. A background thread renews the lease every third of ``lease_seconds``
+    while ``func`` runs. Returns the number of jobs completed.
+    """
+    queue = WorkQueue(path, lease_seconds)
+    me = worker_id()
+    done = 0
+    try:
+        while True:
+            job = queue.lease(me)
+            if job is None:
+                if queue.seeded() and queue.unfinished() == 0:
+                    break
+                time.sleep(poll)
+                continue
+            job_id, payload = job
+            stop = threading.Event()
+            beat = threading.Thread(
+                target=_heartbeat, args=(path, job_id, me, lease_seconds, stop), daemon=True
+            )
+            beat.start()
+            try:
+                result = func(payload)
+            except Exception as exc:
+                queue.fail(job_id, me, repr(exc))
+            else:
+                if queue.complete(job_id, me, result):
+                    done += 1
+            finally:
+                stop.set()
+                beat.join()
+    finally:
+        queue.close()
+    return done
+
+
+def _heartbeat(path, job_id, worker, lease_seconds, stop) -> None:
+    # sqlite connections cannot be shared across threads
+    queue = WorkQueue(path, lease_seconds)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(job_id, worker):
+                break
+    finally:
+        queue.close()